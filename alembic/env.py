@@ -0,0 +1,77 @@
+"""
+Alembic Environment
+Runs migrations over the app's async engine configuration
+"""
+
+from logging.config import fileConfig
+import asyncio
+
+from alembic import context
+from sqlalchemy import inspect, pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import get_database_url
+from database import Base
+import models  # noqa: F401  (registers tables on Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL without a database connection (alembic upgrade --sql)"""
+    context.configure(
+        url=get_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# First revision; its tables are what the app's old startup create_all made
+BASELINE_REVISION = "0001"
+
+
+def stamp_unversioned_schema(connection) -> None:
+    """
+    Adopt a database created by the old startup create_all
+
+    Such databases have the baseline tables but no alembic_version, so
+    revision 0001 would fail on the existing tables. Stamp them at 0001
+    first; the later revisions then apply as usual.
+    """
+    inspector = inspect(connection)
+    if inspector.has_table("alembic_version") or not inspector.has_table("organizations"):
+        return
+    context.get_context().stamp(context.script, BASELINE_REVISION)
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        stamp_unversioned_schema(connection)
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """Run migrations on a single short-lived connection"""
+    connectable = create_async_engine(get_database_url(), poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,24 @@
+"""Composite indexes for lesson usage counts and lesson lists
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+"""
+
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_lessons_org_created", "lesson_plans", ["organization_id", "created_at"], unique=False)
+    op.create_index("ix_lessons_user_created", "lesson_plans", ["user_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lessons_user_created", table_name="lesson_plans")
+    op.drop_index("ix_lessons_org_created", table_name="lesson_plans")
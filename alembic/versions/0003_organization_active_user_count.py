@@ -0,0 +1,37 @@
+"""Denormalized active user count on organizations
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "organizations",
+        sa.Column("active_user_count", sa.Integer(), server_default="0", nullable=True),
+    )
+    # Backfill from the users table
+    op.execute(
+        """
+        UPDATE organizations
+        SET active_user_count = (
+            SELECT count(*) FROM users
+            WHERE users.organization_id = organizations.id
+              AND users.is_active
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("organizations", "active_user_count")
@@ -0,0 +1,40 @@
+"""Lesson batches submitted to the OpenAI Batch API
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lesson_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column("openai_batch_id", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("requests", sa.JSON(), nullable=False),
+        sa.Column("quota_reserved", sa.Boolean(), nullable=False),
+        sa.Column("lessons_created", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_lesson_batches_id"), "lesson_batches", ["id"], unique=False)
+    op.create_index(op.f("ix_lesson_batches_status"), "lesson_batches", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_lesson_batches_status"), table_name="lesson_batches")
+    op.drop_index(op.f("ix_lesson_batches_id"), table_name="lesson_batches")
+    op.drop_table("lesson_batches")
@@ -0,0 +1,26 @@
+"""Count failed attempts at saving a lesson batch's output
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "lesson_batches",
+        sa.Column("save_attempts", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("lesson_batches", "save_attempts")
@@ -9,10 +9,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+import anyio
 import os
 
-from database import get_db
+from cache import USER_CACHE_TTL_SECONDS, cache_get, cache_set, user_key
+from database import attach_cached, get_db
 import models
 import schemas
 
@@ -21,21 +25,67 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# bcrypt cost factor (each +1 doubles hashing time)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Max concurrent bcrypt operations; bcrypt releases the GIL, so up to one
+# per core run in parallel, and a burst of logins can't take every
+# worker thread from other blocking work
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 4)))
+_password_hash_limiter: Optional[anyio.CapacityLimiter] = None
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+# User columns kept in the Redis user cache (the public User schema). No
+# API endpoint changes an existing user's role or is_active, so nothing
+# invalidates the entry besides login; anything that starts writing those
+# must cache_delete(user_key(email)), or the change waits out the TTL
+CURRENT_USER_COLUMNS = tuple(getattr(models.User, name) for name in schemas.User.model_fields)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Hash a password
+    
+    Pass a low `rounds` only for demo/test seed data; real accounts
+    should use the default BCRYPT_ROUNDS cost.
+    """
+    if rounds is None:
+        return pwd_context.hash(password)
+    return pwd_context.handler("bcrypt").using(rounds=rounds).hash(password)
+
+
+def _get_password_hash_limiter() -> anyio.CapacityLimiter:
+    # Created on first use: anyio limiters must be built inside the event loop
+    global _password_hash_limiter
+    if _password_hash_limiter is None:
+        _password_hash_limiter = anyio.CapacityLimiter(PASSWORD_HASH_CONCURRENCY)
+    return _password_hash_limiter
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in a worker thread, off the event loop"""
+    return await anyio.to_thread.run_sync(
+        verify_password, plain_password, hashed_password,
+        limiter=_get_password_hash_limiter()
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in a worker thread, off the event loop"""
+    return await anyio.to_thread.run_sync(
+        get_password_hash, password,
+        limiter=_get_password_hash_limiter()
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -53,7 +103,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> models.User:
     """Get the current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -71,10 +121,28 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+    # Every authenticated request resolves the token here, so serve the
+    # user row from Redis when possible
+    cached = await cache_get(user_key(token_data.email))
+    if cached is not None:
+        return attach_cached(db, models.User, schemas.User.model_validate(cached).model_dump())
+    
+    # Load the same columns the cache holds, so handlers get one shape of
+    # user either way; the rest (password hash, updated_at) raise if read
+    result = await db.execute(
+        select(models.User)
+        .options(load_only(*CURRENT_USER_COLUMNS, raiseload=True))
+        .where(models.User.email == token_data.email)
+    )
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
     
+    await cache_set(
+        user_key(user.email),
+        schemas.User.model_validate(user).model_dump(mode="json"),
+        ttl=USER_CACHE_TTL_SECONDS
+    )
     return user
 
 
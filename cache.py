@@ -0,0 +1,269 @@
+"""
+Cache Configuration
+Redis-backed cache for hot lookups shared across workers
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+import calendar
+import logging
+import os
+
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Caching is enabled only when REDIS_URL is set
+# Format: redis://host:port/db
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+# Authenticated users are cached briefly; role/active changes made
+# outside the API can take this long to be seen
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+# Generated lesson content, reused for identical prompts
+LESSON_CACHE_TTL_SECONDS = int(os.getenv("LESSON_CACHE_TTL_SECONDS", "86400"))
+# A user's lesson list pages; dropped whenever they save or delete a lesson
+LESSON_LIST_CACHE_TTL_SECONDS = int(os.getenv("LESSON_LIST_CACHE_TTL_SECONDS", "60"))
+# Background lesson generation jobs stay pollable this long
+LESSON_JOB_TTL_SECONDS = int(os.getenv("LESSON_JOB_TTL_SECONDS", "3600"))
+# Platform-wide admin dashboard figures (aggregates over every lesson)
+ADMIN_STATS_CACHE_TTL_SECONDS = int(os.getenv("ADMIN_STATS_CACHE_TTL_SECONDS", "300"))
+
+redis_client: Optional[aioredis.Redis] = (
+    aioredis.from_url(REDIS_URL) if REDIS_URL else None
+)
+
+
+def org_key(org_id: int) -> str:
+    """Cache key for an organization row"""
+    return f"org:{org_id}"
+
+
+def user_key(email: str) -> str:
+    """Cache key for an authenticated user, looked up by JWT subject"""
+    return f"user:{email}"
+
+
+def lesson_content_key(prompt_hash: str) -> str:
+    """Cache key for the lesson content generated from a prompt"""
+    return f"lesson:{prompt_hash}"
+
+
+def lesson_plan_key(lesson_id: int) -> str:
+    """Cache key for a saved lesson plan"""
+    return f"lesson_plan:{lesson_id}"
+
+
+def admin_stats_key() -> str:
+    """Cache key for the admin dashboard statistics"""
+    return "admin:stats"
+
+
+def lesson_list_key(user_id: int) -> str:
+    """Cache key for the hash of a user's lesson list pages"""
+    return f"lesson_list:{user_id}"
+
+
+def lesson_job_key(job_id: str) -> str:
+    """Cache key for the status of a background lesson generation job"""
+    return f"lesson_job:{job_id}"
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """
+    Get a cached JSON value
+
+    Returns:
+        Decoded value, or None on a miss or when Redis is unavailable
+    """
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def cache_set(key: str, value: Any, ttl: int = CACHE_TTL_SECONDS) -> None:
+    """Store a JSON-serializable value with a TTL"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(key, orjson.dumps(value), ex=ttl)
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+async def cache_hget(key: str, field: str) -> Optional[Any]:
+    """
+    Get a cached JSON value from a field of a hash
+
+    Returns:
+        Decoded value, or None on a miss or when Redis is unavailable
+    """
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.hget(key, field)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s[%s]: %s", key, field, e)
+        return None
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def cache_hset(key: str, field: str, value: Any, ttl: int = CACHE_TTL_SECONDS) -> None:
+    """
+    Store a JSON-serializable value in a field of a hash
+
+    Related values share one hash so cache_delete(key) drops them all;
+    the TTL applies to the whole hash.
+    """
+    if redis_client is None:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, field, orjson.dumps(value))
+            pipe.expire(key, ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Cache write failed for %s[%s]: %s", key, field, e)
+
+
+async def cache_delete(*keys: str) -> None:
+    """Invalidate cached values"""
+    if redis_client is None or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning("Cache delete failed for %s: %s", keys, e)
+
+
+# ==================== MONTHLY USAGE COUNTERS ====================
+# Per-org lesson counters for the current month, so the quota check is an
+# O(1) Redis call instead of a COUNT(*) over lesson_plans. Counters are
+# seeded from the database on a cold miss and expire after the month ends.
+
+# Reserve one lesson if under the limit: -1 = counter not seeded,
+# 0 = limit reached, 1 = reserved. Atomic, so concurrent generates
+# can't overshoot max_monthly_lessons.
+_RESERVE_LESSON_LUA = """
+local used = redis.call('GET', KEYS[1])
+if not used then
+    return -1
+end
+if tonumber(used) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+return 1
+"""
+
+# Give back one lesson, only if the counter still exists
+_RELEASE_LESSON_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('DECR', KEYS[1])
+end
+return -1
+"""
+
+
+def monthly_lessons_key(org_id: int, when: datetime) -> str:
+    """Cache key for an organization's lesson count in the month of `when`"""
+    return f"org:{org_id}:lessons:{when:%Y%m}"
+
+
+def _month_expiry(when: datetime) -> int:
+    """Unix timestamp a day after the month of `when` ends"""
+    last_day = calendar.monthrange(when.year, when.month)[1]
+    month_end = datetime(when.year, when.month, last_day, 23, 59, 59)
+    return calendar.timegm(month_end.timetuple()) + 86400
+
+
+async def seed_monthly_lessons(org_id: int, count: int, when: datetime) -> None:
+    """Initialize a cold monthly counter from the database count"""
+    if redis_client is None:
+        return
+    key = monthly_lessons_key(org_id, when)
+    try:
+        # NX: never clobber a counter another request already seeded
+        if await redis_client.set(key, count, nx=True):
+            await redis_client.expireat(key, _month_expiry(when))
+    except RedisError as e:
+        logger.warning("Usage counter seed failed for org %s: %s", org_id, e)
+
+
+async def seed_all_monthly_lessons(counts: dict, when: datetime) -> None:
+    """
+    Initialize many cold monthly counters in one pipelined round-trip
+
+    Args:
+        counts: Lessons this month by organization id
+        when: Any time within the month counted
+    """
+    if redis_client is None or not counts:
+        return
+    expiry = _month_expiry(when)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for org_id, count in counts.items():
+                key = monthly_lessons_key(org_id, when)
+                pipe.set(key, count, nx=True)
+                # Harmless on a key that was already seeded this month
+                pipe.expireat(key, expiry)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Usage counter bulk seed failed: %s", e)
+
+
+async def get_monthly_lessons(org_id: int, when: datetime) -> Optional[int]:
+    """
+    Read an organization's lesson count for the month of `when`
+
+    Returns:
+        The count, or None if the counter isn't seeded or Redis is unavailable
+    """
+    if redis_client is None:
+        return None
+    try:
+        used = await redis_client.get(monthly_lessons_key(org_id, when))
+    except RedisError as e:
+        logger.warning("Usage counter read failed for org %s: %s", org_id, e)
+        return None
+    return int(used) if used is not None else None
+
+
+async def reserve_monthly_lesson(org_id: int, limit: int, when: datetime) -> Optional[bool]:
+    """
+    Atomically count one lesson against the monthly limit
+
+    Returns:
+        True if reserved, False if the limit is reached,
+        None if the counter isn't seeded or Redis is unavailable
+    """
+    if redis_client is None:
+        return None
+    try:
+        result = await redis_client.eval(
+            _RESERVE_LESSON_LUA, 1, monthly_lessons_key(org_id, when), limit
+        )
+    except RedisError as e:
+        logger.warning("Usage counter reserve failed for org %s: %s", org_id, e)
+        return None
+    if result == -1:
+        return None
+    return result == 1
+
+
+async def release_monthly_lesson(org_id: int, when: datetime) -> None:
+    """Return a reserved lesson (failed generation or deleted lesson)"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.eval(_RELEASE_LESSON_LUA, 1, monthly_lessons_key(org_id, when))
+    except RedisError as e:
+        logger.warning("Usage counter release failed for org %s: %s", org_id, e)
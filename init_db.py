@@ -4,125 +4,155 @@ Creates the first super admin user and organization
 Run this after deploying to set up your platform
 """
 
+import asyncio
+import getpass
 import sys
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from sqlalchemy import insert, select
+from database import SessionLocal, bootstrap_schema, upgrade_schema
 import models
-from auth import get_password_hash
+from auth import get_password_hash, get_password_hash_async
 
-def init_db():
+# Demo teacher accounts: (email, full name, password)
+DEMO_TEACHERS = [
+    ("teacher@demo.edu", "Demo Teacher", "demo123"),
+]
+
+# Cheap bcrypt cost for throwaway demo accounts (256x faster than 12)
+DEMO_PASSWORD_ROUNDS = 4
+
+async def init_db():
     """Initialize database with first organization and super admin"""
     
-    # Create all tables
-    models.Base.metadata.create_all(bind=engine)
+    # Bring the schema up to date (create_all only for a first-ever --bootstrap)
+    if "--bootstrap" in sys.argv:
+        await bootstrap_schema()
+    else:
+        await upgrade_schema()
+    
+    # Check if super admin already exists (only the email is needed)
+    async with SessionLocal() as db:
+        existing_admin_email = await db.scalar(
+            select(models.User.email)
+            .where(models.User.role == "super_admin")
+            .limit(1)
+        )
+    
+    if existing_admin_email:
+        print("âŒ Super admin already exists!")
+        print(f"   Email: {existing_admin_email}")
+        return
+    
+    # Collect super admin details and hash the password before opening
+    # the write session, so no pooled connection sits idle while the
+    # admin types
+    admin_email = input("\nEnter super admin email: ").strip()
+    admin_password = getpass.getpass("Enter super admin password: ").strip()
+    admin_name = input("Enter super admin full name: ").strip()
+    
+    if not admin_email or not admin_password or not admin_name:
+        print("âŒ All fields are required!")
+        return
     
-    db = SessionLocal()
+    hashed_password = await get_password_hash_async(admin_password)
     
     try:
-        # Check if super admin already exists
-        existing_admin = db.query(models.User).filter(
-            models.User.role == "super_admin"
-        ).first()
-        
-        if existing_admin:
-            print("âŒ Super admin already exists!")
-            print(f"   Email: {existing_admin.email}")
-            return
-        
-        # Create Edu-SmartAI organization (your company)
-        org = models.Organization(
-            name="Edu-SmartAI",
-            contact_email="admin@edu-smartai.com",
-            contact_name="Administrator",
-            subscription_tier="enterprise",
-            max_monthly_lessons=999999,  # Unlimited for admin
-            is_active=True
-        )
-        db.add(org)
-        db.commit()
-        db.refresh(org)
-        
-        print("âœ… Created Edu-SmartAI organization")
-        
-        # Create super admin user
-        admin_email = input("\nEnter super admin email: ").strip()
-        admin_password = input("Enter super admin password: ").strip()
-        admin_name = input("Enter super admin full name: ").strip()
-        
-        if not admin_email or not admin_password or not admin_name:
-            print("âŒ All fields are required!")
-            return
-        
-        admin_user = models.User(
-            email=admin_email,
-            hashed_password=get_password_hash(admin_password),
-            full_name=admin_name,
-            role="super_admin",
-            organization_id=org.id,
-            is_active=True
-        )
-        db.add(admin_user)
-        db.commit()
-        
-        print("\n" + "="*50)
-        print("âœ… SETUP COMPLETE!")
-        print("="*50)
-        print(f"Super Admin Email: {admin_email}")
-        print(f"Organization ID: {org.id}")
-        print("\nYou can now:")
-        print("1. Login to the admin dashboard")
-        print("2. Create charter school organizations")
-        print("3. Add teachers to organizations")
-        print("="*50)
-        
+        # Organization and super admin commit together or not at all
+        async with SessionLocal() as db, db.begin():
+            # Create Edu-SmartAI organization (your company)
+            org = models.Organization(
+                name="Edu-SmartAI",
+                contact_email="admin@edu-smartai.com",
+                contact_name="Administrator",
+                subscription_tier="enterprise",
+                max_monthly_lessons=999999,  # Unlimited for admin
+                is_active=True,
+                active_user_count=1  # The super admin below
+            )
+            
+            # Create super admin user; linking through the relationship lets
+            # the commit's flush fill in organization_id from the org's
+            # INSERT ... RETURNING (still two INSERTs, org first) without
+            # an explicit flush in between
+            db.add(models.User(
+                email=admin_email,
+                hashed_password=hashed_password,
+                full_name=admin_name,
+                role="super_admin",
+                organization=org,
+                is_active=True
+            ))
+        org_id = org.id
     except Exception as e:
         print(f"âŒ Error: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        return
+    
+    print("âœ… Created Edu-SmartAI organization")
+    
+    print("\n" + "="*50)
+    print("âœ… SETUP COMPLETE!")
+    print("="*50)
+    print(f"Super Admin Email: {admin_email}")
+    print(f"Organization ID: {org_id}")
+    print("\nYou can now:")
+    print("1. Login to the admin dashboard")
+    print("2. Create charter school organizations")
+    print("3. Add teachers to organizations")
+    print("="*50)
 
 
-def create_demo_org():
-    """Create a demo organization with sample data"""
-    db = SessionLocal()
+async def create_demo_org(teachers=DEMO_TEACHERS):
+    """
+    Create a demo organization with sample data
+    
+    Args:
+        teachers: (email, full name, password) tuples to seed as teachers
+    """
+    # Hash each distinct demo password once, before taking a connection
+    demo_hashes = {
+        password: get_password_hash(password, rounds=DEMO_PASSWORD_ROUNDS)
+        for password in {password for _, _, password in teachers}
+    }
     
     try:
-        # Create demo charter school
-        demo_org = models.Organization(
-            name="Demo Charter School",
-            contact_email="demo@charterschool.edu",
-            contact_name="Demo Principal",
-            subscription_tier="pro",
-            max_monthly_lessons=500,
-            is_active=True
-        )
-        db.add(demo_org)
-        db.commit()
-        db.refresh(demo_org)
-        
-        print(f"âœ… Created demo organization (ID: {demo_org.id})")
-        
-        # Create demo teacher
-        demo_teacher = models.User(
-            email="teacher@demo.edu",
-            hashed_password=get_password_hash("demo123"),
-            full_name="Demo Teacher",
-            role="teacher",
-            organization_id=demo_org.id,
-            is_active=True
-        )
-        db.add(demo_teacher)
-        db.commit()
-        
-        print("âœ… Created demo teacher")
-        print(f"   Email: teacher@demo.edu")
-        print(f"   Password: demo123")
-        
+        # Organization and teachers commit together or not at all
+        async with SessionLocal() as db, db.begin():
+            # Create demo charter school
+            demo_org = models.Organization(
+                name="Demo Charter School",
+                contact_email="demo@charterschool.edu",
+                contact_name="Demo Principal",
+                subscription_tier="pro",
+                max_monthly_lessons=500,
+                is_active=True,
+                active_user_count=len(teachers)
+            )
+            db.add(demo_org)
+            await db.flush()  # Assigns demo_org.id without committing
+            demo_org_id = demo_org.id
+            
+            # Create demo teachers with Core multi-row INSERTs (no ORM
+            # unit-of-work overhead; batched per DB_INSERT_PAGE_SIZE rows)
+            teacher_rows = [
+                {
+                    "email": email,
+                    "hashed_password": demo_hashes[password],
+                    "full_name": full_name,
+                    "role": "teacher",
+                    "organization_id": demo_org_id,
+                    "is_active": True
+                }
+                for email, full_name, password in teachers
+            ]
+            await db.execute(insert(models.User.__table__), teacher_rows)
     except Exception as e:
         print(f"âŒ Error creating demo: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        return
+    
+    print(f"âœ… Created demo organization (ID: {demo_org_id})")
+    print(f"âœ… Created {len(teacher_rows)} demo teacher(s)")
+    for email, _, password in teachers:
+        print(f"   Email: {email}")
+        print(f"   Password: {password}")
 
 
 if __name__ == "__main__":
@@ -131,6 +161,6 @@ if __name__ == "__main__":
     print("="*50)
     
     if len(sys.argv) > 1 and sys.argv[1] == "--demo":
-        create_demo_org()
+        asyncio.run(create_demo_org())
     else:
-        init_db()
+        asyncio.run(init_db())
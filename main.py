@@ -3,24 +3,66 @@ Edu-SmartAI Lesson Plan Generator - Backend API
 FastAPI server with secure OpenAI integration and multi-tenant support
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from sqlalchemy import and_, bindparam, exists, insert, literal, select, func, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timedelta
 from typing import Optional, List
+from functools import lru_cache
+from types import MappingProxyType
 import os
+import anyio
 from dotenv import load_dotenv
-import openai
-import json
+from openai import AsyncOpenAI, DEFAULT_TIMEOUT, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+import asyncio
+import base64
+import hashlib
+import httpx
+import logging
+import orjson
 import re
-
-from database import get_db, engine
+import uuid
+
+from database import SessionLocal, attach_cached, get_db, create_tables, warm_pool
+from rate_limiter import RateLimiter, estimate_tokens
+from cache import (
+    cache_get,
+    cache_set,
+    cache_delete,
+    org_key,
+    user_key,
+    lesson_content_key,
+    lesson_job_key,
+    lesson_plan_key,
+    lesson_list_key,
+    admin_stats_key,
+    cache_hget,
+    cache_hset,
+    LESSON_CACHE_TTL_SECONDS,
+    LESSON_LIST_CACHE_TTL_SECONDS,
+    LESSON_JOB_TTL_SECONDS,
+    ADMIN_STATS_CACHE_TTL_SECONDS,
+    redis_client,
+    seed_monthly_lessons,
+    seed_all_monthly_lessons,
+    get_monthly_lessons,
+    reserve_monthly_lesson,
+    release_monthly_lesson
+)
 import models
 import schemas
 from auth import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_user,
     get_current_active_user
@@ -32,8 +74,7 @@ from modules.teks import router as teks_router
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,57 +83,276 @@ app = FastAPI(
     version="1.0.0"
 )
 
+
+# Schema is managed by Alembic (alembic upgrade head / python init_db.py);
+# set INIT_CREATE_ALL=1 only for throwaway local databases
+INIT_CREATE_ALL = os.getenv("INIT_CREATE_ALL", "0") == "1"
+
+# Worker threads for blocking work (bcrypt hashing/verification) so it
+# never runs on the event loop; anyio's default is 40
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+
+@app.on_event("startup")
+async def create_db_tables():
+    """Create missing database tables (the async engine can't run DDL at import time)"""
+    if INIT_CREATE_ALL:
+        await create_tables()
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """Size the worker thread pool used by anyio.to_thread"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+@app.on_event("startup")
+async def warm_db_pool():
+    """Pre-fill the connection pool before serving traffic"""
+    await warm_pool()
+
 # ==================== UTF-8 JSON RESPONSE CLASS ====================
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 class UTF8JSONResponse(JSONResponse):
     """Custom JSON response ensuring UTF-8 encoding"""
+    # Declare the charset here so Starlette sends it with every JSON
+    # response; no per-response header rewriting is needed
+    media_type = "application/json; charset=utf-8"
+    
     def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,  # CRITICAL: allows Spanish characters
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+        # orjson emits compact UTF-8 bytes directly, so Spanish characters
+        # are written as-is with no ensure_ascii escaping or .encode() pass
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
 # Set as default response class for all routes
 app.router.default_response_class = UTF8JSONResponse
+
+
+def _declare_utf8(response: Response) -> Response:
+    """Add the UTF-8 charset to one of FastAPI's default JSON error responses"""
+    if response.headers.get("content-type") == "application/json":
+        response.headers["content-type"] = UTF8JSONResponse.media_type
+    return response
+
+
+# Error responses are built by FastAPI's own handlers (plain JSONResponse);
+# wrap them so errors echoing Spanish input declare UTF-8 too
+@app.exception_handler(StarletteHTTPException)
+async def utf8_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    return _declare_utf8(await http_exception_handler(request, exc))
+
+
+@app.exception_handler(RequestValidationError)
+async def utf8_validation_exception_handler(request: Request, exc: RequestValidationError):
+    return _declare_utf8(await request_validation_exception_handler(request, exc))
 # ====================================================================
 
 # Configure CORS
+# Set CORS_ALLOW_ORIGINS to a comma-separated list of frontend origins in
+# production; "*" (the default) allows any origin
+CORS_ALLOW_ORIGINS = [
+    origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()
+]
+# How long browsers may reuse a preflight result (Starlette's default is
+# 10 minutes; browsers cap it, Chrome at 2 hours)
+CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,
+    # Auth is a bearer token in the Authorization header, not cookies, so
+    # credentialed CORS (and per-request origin echoing) isn't needed
+    allow_credentials=False,
+    # Explicit lists: the methods and headers this API actually uses
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    # Response headers browser code may read (pagination)
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
+    max_age=CORS_MAX_AGE,
+)
+
+# Compress JSON responses (lesson plans run 10-50 KB and shrink several-fold).
+# Bodies under GZIP_MINIMUM_SIZE bytes aren't worth the CPU; level 5 gets
+# most of level 9's ratio for a fraction of the time
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESSLEVEL = int(os.getenv("GZIP_COMPRESSLEVEL", "5"))
+
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    compresslevel=GZIP_COMPRESSLEVEL,
 )
 
-# ==================== UTF-8 ENCODING MIDDLEWARE ====================
-@app.middleware("http")
-async def enforce_utf8_encoding(request, call_next):
+
+# ==================== HTTP CACHING ====================
+# Lesson plans never change after generation, and organizations change
+# rarely, so their GET endpoints send ETags and answer a matching
+# If-None-Match with 304 and no body
+
+LESSON_CACHE_CONTROL = "private, max-age=300"
+ORGANIZATION_CACHE_CONTROL = "private, no-cache"  # Usage counters move; always revalidate
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the given version-identifying values"""
+    raw = "-".join(str(part) for part in parts)
+    return f'W/"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+
+
+def not_modified(request: Request, response: Response, etag: str, cache_control: str) -> Optional[Response]:
     """
-    Ensures all HTTP responses use UTF-8 encoding.
-    Fixes Spanish character display issues.
+    Set caching headers and check the client's copy
+    
+    Returns:
+        A 304 response if If-None-Match matches `etag`, otherwise None
+        (the headers are set on `response` for the normal reply)
     """
-    response = await call_next(request)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    # Weak comparison: W/ prefixes are ignored (RFC 9110 13.1.2)
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# Cap in-flight generations so bursts queue here instead of tripping
+# OpenAI rate limits; tune to the account's RPM tier
+MAX_CONCURRENT_LLM = int(os.getenv("MAX_CONCURRENT_LLM", "8"))
+LLM_SEM = asyncio.Semaphore(MAX_CONCURRENT_LLM)
+
+# Keep a warm connection for every generation slot. The SDK default drops
+# idle connections after 5s, so lessons requested a few seconds apart
+# each paid a new TLS handshake to the API.
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60"))
+OPENAI_HTTP_LIMITS = httpx.Limits(
+    max_connections=max(100, MAX_CONCURRENT_LLM),
+    max_keepalive_connections=MAX_CONCURRENT_LLM,
+    keepalive_expiry=OPENAI_KEEPALIVE_SECONDS
+)
+
+# Configure OpenAI
+# Async client, so the event loop keeps serving other requests while a
+# generation is in flight
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+openai_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(limits=OPENAI_HTTP_LIMITS, timeout=DEFAULT_TIMEOUT)
+) if OPENAI_API_KEY else None
+
+
+@app.on_event("shutdown")
+async def close_openai_client():
+    """Close the OpenAI client's pooled HTTP connections"""
+    if openai_client is not None:
+        await openai_client.close()
+
+# Proactive OpenAI budget so bursts wait here instead of hitting 429s and
+# backing off; limits are per process, so divide the account's limits by
+# the number of workers
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "60"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "150000"))
+LLM_RATE_LIMITER = RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)
+
+# gpt-4o-mini in JSON mode returns well-formed lesson JSON several times
+# faster and cheaper than gpt-4-turbo
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+LESSON_SYSTEM_PROMPT = "You are an expert K-12 educator and curriculum designer specializing in Texas TEKS standards. Generate comprehensive, practical lesson plans in valid JSON format only. When asked to write a story, write the complete narrative directly in the JSON - never use placeholders. Do not include any text before or after the JSON."
+
+
+# Completion cap per lesson; also what the rate limiter reserves up front
+LESSON_MAX_TOKENS = 4000
+LESSON_TEMPERATURE = 0.7
+# Flat per-lesson cost estimate (USD) recorded on each generated lesson
+LESSON_API_COST = 0.15
+
+# Structured outputs (a strict JSON schema per requested section set)
+# need a model that supports them, as gpt-4o-mini does; set
+# LESSON_STRUCTURED_OUTPUTS=0 to fall back to plain JSON mode
+LESSON_STRUCTURED_OUTPUTS = os.getenv("LESSON_STRUCTURED_OUTPUTS", "1") == "1"
+
+# Lessons with at least this many sections are generated as one call per
+# section, run concurrently. Generation time grows with output length, so
+# wall time becomes the slowest section's instead of the sum of all of
+# them (each call resends the prompt, mostly as a cached prefix).
+# 0 turns splitting off.
+LESSON_PARALLEL_MIN_SECTIONS = int(os.getenv("LESSON_PARALLEL_MIN_SECTIONS", "5"))
+
+
+LLM_RETRY = retry(
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception_type(RateLimitError),
+    reraise=True,
+)
+
+
+def _lesson_completion_args(prompt: str, response_format: dict) -> dict:
+    """Chat completion arguments for a lesson plan prompt"""
+    return {
+        "model": OPENAI_MODEL,
+        "response_format": response_format,  # See lesson_response_format
+        "messages": [
+            {
+                "role": "system",
+                "content": LESSON_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": LESSON_TEMPERATURE,
+        "max_tokens": LESSON_MAX_TOKENS
+    }
+
+
+def _estimate_lesson_tokens(prompt: str) -> int:
+    """Worst-case tokens for a lesson call: both prompts plus the completion cap"""
+    return estimate_tokens(LESSON_SYSTEM_PROMPT) + estimate_tokens(prompt) + LESSON_MAX_TOKENS
+
+
+@LLM_RETRY
+async def _call_llm(prompt: str, response_format: dict):
+    """
+    Request a lesson plan completion, retrying with backoff on 429s
     
-    # Force UTF-8 encoding for ALL content types
-    if "content-type" in response.headers:
-        content_type = response.headers["content-type"]
-        # Remove existing charset before adding UTF-8
-        if "charset" in content_type:
-            content_type = content_type.split(";")[0].strip()
-        response.headers["content-type"] = f"{content_type}; charset=utf-8"
-    else:
-        response.headers["content-type"] = "application/json; charset=utf-8"
+    Args:
+        prompt: User prompt describing the lesson to generate
+        response_format: Output constraint from lesson_response_format
     
+    Returns:
+        OpenAI chat completion response
+    """
+    reserved = await LLM_RATE_LIMITER.acquire(_estimate_lesson_tokens(prompt))
+    async with LLM_SEM:
+        response = await openai_client.chat.completions.create(
+            **_lesson_completion_args(prompt, response_format)
+        )
+    LLM_RATE_LIMITER.reconcile(reserved, response.usage.total_tokens if response.usage else None)
     return response
-# ====================================================================
 
-# Configure OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+@LLM_RETRY
+async def _open_llm_stream(prompt: str, response_format: dict):
+    """
+    Start a streamed lesson plan completion, retrying with backoff on 429s
+    (the caller holds LLM_SEM while consuming the stream)
+    
+    Args:
+        prompt: User prompt describing the lesson to generate
+        response_format: Output constraint from lesson_response_format
+    
+    Returns:
+        Async iterator of OpenAI chat completion chunks
+    """
+    # Streams report no usage, so the worst-case reservation stands
+    await LLM_RATE_LIMITER.acquire(_estimate_lesson_tokens(prompt))
+    return await openai_client.chat.completions.create(
+        **_lesson_completion_args(prompt, response_format), stream=True
+    )
 
 # Include TEKS router
 app.include_router(teks_router)
@@ -101,8 +361,49 @@ app.include_router(teks_router)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+# ==================== PROMPT FILES ====================
+# Long prompt templates live in prompts/*.txt and are read once at import
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+def _load_prompt(name: str) -> str:
+    """Read a prompt template from prompts/<name>.txt"""
+    with open(os.path.join(PROMPTS_DIR, f"{name}.txt"), encoding="utf-8") as f:
+        return f.read()
+
+
+# The lesson template puts its fixed text and the JSON section block first
+# and the per-request values last: OpenAI caches prompt prefixes (1024+
+# tokens), so requests for the same sections share a discounted prefix
+LESSON_PROMPT_TEMPLATE = _load_prompt("lesson")
+STORY_PROMPT_TEMPLATE = _load_prompt("story")
+MATH_PROBLEMS_PROMPT_TEMPLATE = _load_prompt("math_problems")
+SCENARIOS_PROMPT_TEMPLATE = _load_prompt("scenarios")
+
+
 # ==================== HELPER FUNCTIONS ====================
 
+# Keywords in teacher notes that select each kind of teacher instructions
+# (plain substring matches, so "characters" counts as "character")
+STORY_KEYWORDS = ('story', 'narrative', 'create a story', 'write about', 'tale',
+                  'fiction', 'character', 'plot', 'cuento', 'narrativa')
+MATH_KEYWORDS = ('problem', 'word problem', 'example', 'practice problem',
+                 'math problem', 'calculation', 'solve', 'compute')
+SCENARIO_KEYWORDS = ('scenario', 'fact', 'example', 'real-world', 'situation',
+                     'case study', 'include', 'demonstrate')
+
+
+def _keyword_pattern(keywords: tuple) -> re.Pattern:
+    """One compiled alternation, so a category is checked in a single scan"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+STORY_KEYWORDS_RE = _keyword_pattern(STORY_KEYWORDS)
+MATH_KEYWORDS_RE = _keyword_pattern(MATH_KEYWORDS)
+SCENARIO_KEYWORDS_RE = _keyword_pattern(SCENARIO_KEYWORDS)
+
+
 def detect_teacher_request_type(teacher_notes: str, subject: str) -> str:
     """
     Detect what type of content the teacher is requesting
@@ -118,146 +419,79 @@ def detect_teacher_request_type(teacher_notes: str, subject: str) -> str:
     
     notes_lower = teacher_notes.lower()
     
-    # Story keywords (primarily for ELA)
-    story_keywords = ['story', 'narrative', 'create a story', 'write about', 'tale', 
-                      'fiction', 'character', 'plot', 'cuento', 'narrativa']
-    
-    # Math problem keywords
-    math_keywords = ['problem', 'word problem', 'example', 'practice problem', 
-                     'math problem', 'calculation', 'solve', 'compute']
-    
-    # Scenario/facts keywords
-    scenario_keywords = ['scenario', 'fact', 'example', 'real-world', 'situation',
-                        'case study', 'include', 'demonstrate']
-    
     # Check for story request
-    if any(keyword in notes_lower for keyword in story_keywords):
+    if STORY_KEYWORDS_RE.search(notes_lower):
         return 'story'
     
     # Check for math problems (only for Math subjects)
-    if 'math' in subject.lower() and any(keyword in notes_lower for keyword in math_keywords):
+    if 'math' in subject.lower() and MATH_KEYWORDS_RE.search(notes_lower):
         return 'math_problems'
     
     # Check for scenarios (Science/Social Studies)
-    if any(keyword in notes_lower for keyword in scenario_keywords):
+    if SCENARIO_KEYWORDS_RE.search(notes_lower):
         return 'scenarios'
     
     return 'standard'
 
 
+# Reading level guidance per grade for generated stories
+STORY_COMPLEXITY_BY_GRADE = MappingProxyType({
+    'K': 'kindergarten level (very simple sentences, 3-5 words per sentence, basic vocabulary)',
+    '1': '1st grade level (simple sentences, 5-8 words per sentence, basic sight words)',
+    '2': '2nd grade level (simple to moderate sentences, 8-12 words per sentence)',
+    '3': '3rd grade level (moderate complexity, 10-15 words per sentence, expanding vocabulary)',
+    '4': '4th grade level (moderate complexity with some complex sentences, varied vocabulary)',
+    '5': '5th grade level (varied sentence complexity, academic vocabulary)',
+    '6': '6th grade level (complex sentences, academic and subject-specific vocabulary)',
+    '7': '7th grade level (sophisticated vocabulary, varied sentence structures)',
+    '8': '8th grade level (advanced vocabulary, complex sentence structures)'
+})
+
+
 def generate_story_prompt(teacher_notes: str, grade_level: str, subject: str, language: str) -> str:
     """Generate detailed story creation prompt"""
     
-    grade_levels = {
-        'K': 'kindergarten level (very simple sentences, 3-5 words per sentence, basic vocabulary)',
-        '1': '1st grade level (simple sentences, 5-8 words per sentence, basic sight words)',
-        '2': '2nd grade level (simple to moderate sentences, 8-12 words per sentence)',
-        '3': '3rd grade level (moderate complexity, 10-15 words per sentence, expanding vocabulary)',
-        '4': '4th grade level (moderate complexity with some complex sentences, varied vocabulary)',
-        '5': '5th grade level (varied sentence complexity, academic vocabulary)',
-        '6': '6th grade level (complex sentences, academic and subject-specific vocabulary)',
-        '7': '7th grade level (sophisticated vocabulary, varied sentence structures)',
-        '8': '8th grade level (advanced vocabulary, complex sentence structures)'
-    }
-    
-    story_complexity = grade_levels.get(grade_level, '4th grade level')
+    story_complexity = STORY_COMPLEXITY_BY_GRADE.get(grade_level, '4th grade level')
     
-    return f"""
-═══════════════════════════════════════════════════════════════════════════════
-🎯 STORY GENERATION REQUEST
-═══════════════════════════════════════════════════════════════════════════════
-
-TEACHER'S REQUEST: {teacher_notes}
-
-🚨 CRITICAL: WRITE A COMPLETE 400-600 WORD NARRATIVE STORY 🚨
-
-YOU MUST write the ACTUAL complete story in the "anticipatorySet" field.
-
-NOT:
-❌ "[Insert story here]"
-❌ A 2-3 sentence summary
-❌ A placeholder
-
-YES:
-✅ Complete 400-600 word narrative story
-✅ Beginning, middle, and end
-✅ Character dialogue: "I'm excited!" she said.
-✅ Sensory details and emotions
-✅ Written at {story_complexity}
-
-STRUCTURE:
-- Opening (100-150 words): Introduce characters, setting, situation
-- Middle (200-300 words): Action, dialogue, events, emotions
-- Ending (100-150 words): Resolution, learning moment
-
-AFTER writing the story, integrate the characters into ALL practice problems and activities throughout the lesson.
-
-═══════════════════════════════════════════════════════════════════════════════
-"""
+    return STORY_PROMPT_TEMPLATE.format(teacher_notes=teacher_notes, story_complexity=story_complexity)
 
 
 def generate_math_problems_prompt(teacher_notes: str, grade_level: str, teks_standard: str) -> str:
     """Generate math problems based on teacher request"""
-    return f"""
-═══════════════════════════════════════════════════════════════════════════════
-📐 MATH PROBLEMS REQUEST
-═══════════════════════════════════════════════════════════════════════════════
-
-TEACHER'S REQUEST: {teacher_notes}
-
-Create word problems based on:
-- Grade {grade_level} level
-- TEKS Standard: {teks_standard}
-- Real-world contexts appropriate for this grade
-
-Include the requested number and type of problems in:
-- Guided Practice section (with step-by-step solutions)
-- Independent Practice section (for students to solve)
-
-Make problems engaging and relatable to {grade_level} graders.
-
-═══════════════════════════════════════════════════════════════════════════════
-"""
+    return MATH_PROBLEMS_PROMPT_TEMPLATE.format(teacher_notes=teacher_notes, grade_level=grade_level, teks_standard=teks_standard)
 
 
 def generate_scenarios_prompt(teacher_notes: str, subject: str) -> str:
     """Generate scenarios/facts for Science or Social Studies"""
-    return f"""
-═══════════════════════════════════════════════════════════════════════════════
-🔬 SCENARIOS / FACTS REQUEST
-═══════════════════════════════════════════════════════════════════════════════
-
-TEACHER'S REQUEST: {teacher_notes}
-
-For this {subject} lesson:
-- Include the requested scenarios, facts, or examples in the "directInstruction" section
-- Make content engaging and age-appropriate
-- Use real-world connections when possible
-- Ensure accuracy and educational value
-
-═══════════════════════════════════════════════════════════════════════════════
-"""
+    return SCENARIOS_PROMPT_TEMPLATE.format(teacher_notes=teacher_notes, subject=subject)
 
 
 # ==================== AUTHENTICATION ENDPOINTS ====================
 
 @app.post("/api/auth/register", response_model=schemas.User)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user (teacher)"""
-    # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+    # Check the email and load the organization in one round-trip: the
+    # outer join from a one-row subquery always yields a row, with
+    # organization None when it doesn't exist
+    one_row = select(literal(1).label("one")).subquery()
+    result = await db.execute(
+        select(
+            exists().where(models.User.email == user.email).label("email_taken"),
+            models.Organization
+        )
+        .select_from(one_row)
+        .outerjoin(models.Organization, models.Organization.id == user.organization_id)
+    )
+    email_taken, organization = result.one()
+    if email_taken:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Check if organization exists
-    organization = db.query(models.Organization).filter(
-        models.Organization.id == user.organization_id
-    ).first()
     if not organization:
         raise HTTPException(status_code=400, detail="Organization not found")
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user (bcrypt is CPU-bound, so hash in a worker thread)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -266,16 +500,21 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
         role=user.role or "teacher"
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await increment_org_counters(db, organization, active_user_count=1)
+    await db.commit()
+    await db.refresh(db_user)
+    
+    # Cached organization now has a stale active user count
+    await cache_delete(org_key(organization.id))
     return db_user
 
 
 @app.post("/api/auth/token", response_model=schemas.Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login and get access token"""
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    result = await db.execute(select(models.User).where(models.User.email == form_data.username))
+    user = result.scalar_one_or_none()
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -287,7 +526,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     
     # Update last login
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    await cache_delete(user_key(user.email))
     
     # Create access token
     access_token = create_access_token(data={"sub": user.email})
@@ -305,7 +545,7 @@ async def read_users_me(current_user: models.User = Depends(get_current_active_u
 @app.post("/api/organizations", response_model=schemas.Organization)
 async def create_organization(
     org: schemas.OrganizationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new organization (charter school)"""
     db_org = models.Organization(
@@ -316,15 +556,17 @@ async def create_organization(
         max_monthly_lessons=org.max_monthly_lessons or 50
     )
     db.add(db_org)
-    db.commit()
-    db.refresh(db_org)
+    await db.commit()
+    await db.refresh(db_org)
     return db_org
 
 
 @app.get("/api/organizations/{org_id}", response_model=schemas.Organization)
 async def get_organization(
     org_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get organization details"""
@@ -332,16 +574,199 @@ async def get_organization(
     if current_user.organization_id != org_id and current_user.role != "super_admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
+    cached = await cache_get(org_key(org_id))
+    if cached is not None:
+        return not_modified(request, response, make_etag(cached), ORGANIZATION_CACHE_CONTROL) or cached
+    
+    # Redis miss (or Redis disabled): read the row and cache it
+    org = await db.get(models.Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
+    
+    org_data = organization_cache_data(org)
+    await cache_set(org_key(org_id), org_data)
+    return not_modified(request, response, make_etag(org_data), ORGANIZATION_CACHE_CONTROL) or org_data
+
+
+def organization_cache_data(org: models.Organization) -> dict:
+    """
+    JSON form of an organization as stored under org_key: the public
+    schema plus the counters handlers read from a cached row
+    """
+    data = schemas.Organization.model_validate(org).model_dump(mode="json")
+    data["active_user_count"] = org.active_user_count
+    return data
+
+
+async def load_organization(db: AsyncSession, org_id: int) -> Optional[models.Organization]:
+    """
+    Get an organization without a database round-trip when possible
+    
+    Checks the session's identity map, then the Redis row cache, and only
+    then SELECTs and caches the row. The identity map only hits when this
+    session already loaded the organization, e.g. the batch poller saving
+    several batches of one org on its shared session; request handlers
+    normally go straight to Redis.
+    
+    Returns:
+        The organization, or None if it doesn't exist
+    """
+    org = db.identity_map.get(db.identity_key(models.Organization, org_id))
+    if org is not None:
+        return org
+    
+    cached = await cache_get(org_key(org_id))
+    if cached is not None and "active_user_count" in cached:
+        data = schemas.Organization.model_validate(cached).model_dump()
+        data["active_user_count"] = cached["active_user_count"]
+        return attach_cached(db, models.Organization, data)
+    
+    org = await db.get(models.Organization, org_id)
+    if org is not None:
+        await cache_set(org_key(org_id), organization_cache_data(org))
     return org
 
 
+async def increment_org_counters(db: AsyncSession, org: models.Organization, **deltas: int) -> None:
+    """
+    Atomically adjust denormalized counters on an organization
+    
+    Issues UPDATE ... SET col = col + n so concurrent requests can't lose
+    updates, then records the new values on the loaded instance
+    
+    Args:
+        db: Database session (the caller commits)
+        org: Organization to update
+        deltas: Counter column names and amounts, e.g. active_user_count=1
+    """
+    columns = [getattr(models.Organization, name) for name in deltas]
+    result = await db.execute(
+        update(models.Organization)
+        .where(models.Organization.id == org.id)
+        .values({column: column + delta for column, delta in zip(columns, deltas.values())})
+        .returning(*columns)
+        .execution_options(synchronize_session=False)
+    )
+    for name, value in zip(deltas, result.one()):
+        set_committed_value(org, name, value)
+
+
+def _month_start(now: datetime) -> datetime:
+    """Midnight on the first day of the month containing `now`"""
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+# Built once at import; callers bind org_id / first_day per execution
+MONTHLY_LESSONS_QUERY = (
+    select(func.count()).select_from(models.LessonPlan).where(
+        models.LessonPlan.organization_id == bindparam("org_id"),
+        models.LessonPlan.created_at >= bindparam("first_day")
+    )
+)
+ORGANIZATION_USAGE_QUERY = select(
+    models.Organization.max_monthly_lessons,
+    models.Organization.total_lessons_generated,
+    models.Organization.active_user_count,
+    models.Organization.subscription_tier,
+    MONTHLY_LESSONS_QUERY.scalar_subquery().label("monthly_lessons")
+).where(models.Organization.id == bindparam("org_id"))
+# Platform totals for the admin dashboard in one round-trip; the lesson
+# figures share a single pass over lesson_plans
+_LESSON_TOTALS = select(
+    func.count().label("total_lessons"),
+    func.count().filter(
+        models.LessonPlan.created_at >= bindparam("first_day")
+    ).label("monthly_lessons"),
+    func.coalesce(func.sum(models.LessonPlan.api_cost), 0).label("total_api_cost")
+).subquery()
+ADMIN_STATS_QUERY = select(
+    select(func.count()).select_from(models.Organization).scalar_subquery().label("total_organizations"),
+    select(func.count()).select_from(models.User).scalar_subquery().label("total_users"),
+    _LESSON_TOTALS.c.total_lessons,
+    _LESSON_TOTALS.c.monthly_lessons,
+    _LESSON_TOTALS.c.total_api_cost
+).select_from(_LESSON_TOTALS)
+# Every organization's lessons this month (0 for orgs with none)
+MONTHLY_LESSONS_BY_ORG_QUERY = (
+    select(models.Organization.id, func.count(models.LessonPlan.id))
+    .outerjoin(models.LessonPlan, and_(
+        models.LessonPlan.organization_id == models.Organization.id,
+        models.LessonPlan.created_at >= bindparam("first_day")
+    ))
+    .group_by(models.Organization.id)
+)
+
+
+async def count_monthly_lessons(db: AsyncSession, org_id: int, now: datetime) -> int:
+    """
+    Count an organization's lessons this month from the database
+    and seed the Redis counter with the result
+    
+    Args:
+        db: Database session
+        org_id: Organization to count
+        now: Any time within the month to count
+    
+    Returns:
+        Number of lessons created this month
+    """
+    monthly_lessons = await db.scalar(
+        MONTHLY_LESSONS_QUERY,
+        {"org_id": org_id, "first_day": _month_start(now)}
+    )
+    await seed_monthly_lessons(org_id, monthly_lessons, now)
+    return monthly_lessons
+
+
+async def seed_all_usage_counters() -> None:
+    """Seed the Redis monthly counter of every organization with one GROUP BY query"""
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        result = await db.execute(
+            MONTHLY_LESSONS_BY_ORG_QUERY,
+            {"first_day": _month_start(now)}
+        )
+        counts = dict(result.all())
+    await seed_all_monthly_lessons(counts, now)
+
+
+async def _warm_usage_counters() -> None:
+    """
+    Seed the monthly counters that don't exist yet, once at startup
+    
+    Existing counters are left as they are (SET NX). Organizations created
+    later, and every org at the start of a month, seed lazily on their
+    first quota check.
+    """
+    try:
+        await seed_all_usage_counters()
+    except Exception as e:
+        # Counters seed lazily per org instead
+        logger.warning("Usage counter warm-up failed: %s", e)
+
+
+_usage_warm_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_usage_counter_warmup():
+    """Warm every organization's quota counter in the background"""
+    global _usage_warm_task
+    if redis_client is not None:
+        _usage_warm_task = asyncio.create_task(_warm_usage_counters())
+
+
+@app.on_event("shutdown")
+async def stop_usage_counter_warmup():
+    """Stop the counter warm-up if it's still running"""
+    if _usage_warm_task is not None:
+        _usage_warm_task.cancel()
+
+
 @app.get("/api/organizations/{org_id}/usage", response_model=schemas.OrganizationUsage)
 async def get_organization_usage(
     org_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get organization usage statistics"""
@@ -349,108 +774,67 @@ async def get_organization_usage(
     if current_user.organization_id != org_id and current_user.role != "super_admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
-    # Get current month's usage
+    # Warm counter: this month's lessons from Redis, the rest from the
+    # (usually cached) organization row
     now = datetime.utcnow()
-    first_day = datetime(now.year, now.month, 1)
-    
-    monthly_lessons = db.query(models.LessonPlan).filter(
-        models.LessonPlan.organization_id == org_id,
-        models.LessonPlan.created_at >= first_day
-    ).count()
+    monthly_lessons = await get_monthly_lessons(org_id, now)
+    if monthly_lessons is not None:
+        org = await load_organization(db, org_id)
+        if org is None:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        return {
+            "organization_id": org_id,
+            "monthly_lessons_used": monthly_lessons,
+            "monthly_lessons_limit": org.max_monthly_lessons,
+            "total_lessons": org.total_lessons_generated,
+            "active_users": org.active_user_count,
+            "subscription_tier": org.subscription_tier
+        }
     
-    total_lessons = db.query(models.LessonPlan).filter(
-        models.LessonPlan.organization_id == org_id
-    ).count()
+    # Cold counter, one round-trip: all-time lessons and active users come
+    # from the org's denormalized counters, this month's lessons from an
+    # (index-backed) count subquery
+    result = await db.execute(
+        ORGANIZATION_USAGE_QUERY,
+        {"org_id": org_id, "first_day": _month_start(now)}
+    )
+    usage = result.one_or_none()
+    if usage is None:
+        raise HTTPException(status_code=404, detail="Organization not found")
     
-    active_users = db.query(models.User).filter(
-        models.User.organization_id == org_id,
-        models.User.is_active == True
-    ).count()
+    # Warm the quota counter used by generate_lesson_plan
+    await seed_monthly_lessons(org_id, usage.monthly_lessons, now)
     
     return {
         "organization_id": org_id,
-        "monthly_lessons_used": monthly_lessons,
-        "monthly_lessons_limit": org.max_monthly_lessons,
-        "total_lessons": total_lessons,
-        "active_users": active_users,
-        "subscription_tier": org.subscription_tier
+        "monthly_lessons_used": usage.monthly_lessons,
+        "monthly_lessons_limit": usage.max_monthly_lessons,
+        "total_lessons": usage.total_lessons_generated,
+        "active_users": usage.active_user_count,
+        "subscription_tier": usage.subscription_tier
     }
 
 
-# ==================== LESSON PLAN ENDPOINTS ====================
+# ==================== LESSON PROMPT TEMPLATES ====================
+# Built once at import; generate_lesson_plan only does lookups and a
+# single str.format per request
 
-@app.post("/api/lessons/generate", response_model=schemas.LessonPlan)
-async def generate_lesson_plan(
-    request: schemas.LessonPlanRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Generate a new lesson plan using OpenAI"""
-    
-    # Validate grade level (K-8 only)
-    valid_grades = ['K', '1', '2', '3', '4', '5', '6', '7', '8']
-    if request.grade_level not in valid_grades:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid grade level. Only Kindergarten through 8th grade are supported."
-        )
-    
-    # Validate subject and grade restrictions
-    valid_subjects = {
-        'Mathematics': ['K', '1', '2', '3', '4', '5', '6', '7', '8'],
-        'Advanced Mathematics': ['6', '7', '8'],
-        'English Language Arts': ['K', '1', '2', '3', '4', '5', '6', '7', '8'],
-        'Spanish Language Arts': ['K', '1', '2', '3', '4', '5'],
-        'Science': ['K', '1', '2', '3', '4', '5', '6', '7', '8'],
-        'Social Studies': ['K', '1', '2', '3', '4', '5', '6', '7', '8']
-    }
-    
-    if request.subject not in valid_subjects:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid subject. Valid subjects are: {', '.join(valid_subjects.keys())}"
-        )
-    
-    if request.grade_level not in valid_subjects[request.subject]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"{request.subject} is only available for grades {', '.join(valid_subjects[request.subject])}"
-        )
-    
-    # Check organization usage limits
-    org = db.query(models.Organization).filter(
-        models.Organization.id == current_user.organization_id
-    ).first()
-    
-    # Count this month's usage
-    now = datetime.utcnow()
-    first_day = datetime(now.year, now.month, 1)
-    monthly_usage = db.query(models.LessonPlan).filter(
-        models.LessonPlan.organization_id == current_user.organization_id,
-        models.LessonPlan.created_at >= first_day
-    ).count()
-    
-    if monthly_usage >= org.max_monthly_lessons:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Monthly limit of {org.max_monthly_lessons} lessons reached. Please upgrade your plan."
-        )
-    
-    # Determine which sections to generate
-    sections = request.sections if request.sections else ['mainLessonPlan', 'guidedPractice', 'independentPractice']
-    
-    # Detect teacher request type
-    request_type = detect_teacher_request_type(request.teacher_notes or '', request.subject)
-    
-    # Generate the prompt
-    language_instructions = {
-        "english": "Generate all content in English only.",
-        "spanish": "Generate all content in Spanish only. All sections, instructions, activities, and materials should be in Spanish.",
-        "bilingual": """Generate all content in BILINGUAL format (English and Spanish side-by-side).
+# Subjects and the grades they're offered in
+VALID_SUBJECTS = MappingProxyType({
+    'Mathematics': ('K', '1', '2', '3', '4', '5', '6', '7', '8'),
+    'Advanced Mathematics': ('6', '7', '8'),
+    'English Language Arts': ('K', '1', '2', '3', '4', '5', '6', '7', '8'),
+    'Spanish Language Arts': ('K', '1', '2', '3', '4', '5'),
+    'Science': ('K', '1', '2', '3', '4', '5', '6', '7', '8'),
+    'Social Studies': ('K', '1', '2', '3', '4', '5', '6', '7', '8')
+})
+
+DEFAULT_SECTIONS = ('mainLessonPlan', 'guidedPractice', 'independentPractice')
+
+LANGUAGE_INSTRUCTIONS = MappingProxyType({
+    "english": "Generate all content in English only.",
+    "spanish": "Generate all content in Spanish only. All sections, instructions, activities, and materials should be in Spanish.",
+    "bilingual": """Generate all content in BILINGUAL format (English and Spanish side-by-side).
         
 CRITICAL BILINGUAL FORMATTING RULES:
 - For each section, provide BOTH English and Spanish versions
@@ -470,18 +854,12 @@ CRITICAL BILINGUAL FORMATTING RULES:
   
 - For materials lists, use bilingual format: "Material name (Nombre del material)"
 - For TEKS standards, keep in English but explain in both languages"""
-    }
-    
-    language_instruction = language_instructions.get(request.language, language_instructions["bilingual"])
-    
-    # Build section-specific prompts based on request type
-    if request_type == 'story':
-        anticipatory_set_instruction = '"anticipatorySet": "WRITE THE COMPLETE 400-600 WORD NARRATIVE STORY HERE. Include character names, dialogue in quotation marks, sensory details, beginning-middle-end structure. NOT a summary or placeholder - the actual full story."'
-    else:
-        anticipatory_set_instruction = '"anticipatorySet": "Brief engaging hook/introduction (2-4 sentences) to capture student interest and connect to prior knowledge"'
-    
-    section_prompts = {
-        'mainLessonPlan': f"""
+})
+
+STORY_ANTICIPATORY_SET = '"anticipatorySet": "WRITE THE COMPLETE 400-600 WORD NARRATIVE STORY HERE. Include character names, dialogue in quotation marks, sensory details, beginning-middle-end structure. NOT a summary or placeholder - the actual full story."'
+HOOK_ANTICIPATORY_SET = '"anticipatorySet": "Brief engaging hook/introduction (2-4 sentences) to capture student interest and connect to prior knowledge"'
+
+MAIN_LESSON_PLAN_TEMPLATE = """
   "mainLessonPlan": {{
     "objective": "Clear, measurable learning objective aligned to TEKS (in requested language)",
     "materials": ["List of required materials (bilingual format if applicable)"],
@@ -489,20 +867,23 @@ CRITICAL BILINGUAL FORMATTING RULES:
     "directInstruction": "Step-by-step teaching procedure with clear teacher actions and explanations",
     "modelingAndChecking": "How to model the concept and check for understanding throughout",
     "closure": "Summary and reflection activity to close the lesson"
-  }}""",
-        'guidedPractice': """
+  }}"""
+
+# Section JSON skeletons; mainLessonPlan is rendered per request type below
+SECTION_PROMPTS = MappingProxyType({
+    'guidedPractice': """
   "guidedPractice": {
     "description": "Detailed guided practice activities where teacher provides support",
     "activities": ["3-4 structured practice activities with teacher guidance"],
     "differentiationStrategies": ["Support strategies for diverse learners"]
   }""",
-        'independentPractice': """
+    'independentPractice': """
   "independentPractice": {
     "description": "Activities students complete with minimal assistance",
     "activities": ["3-4 independent practice tasks"],
     "assessmentCriteria": ["How to assess student work"]
   }""",
-        'learningStations': """
+    'learningStations': """
   "learningStations": [
     {
       "stationName": "Station 1 name",
@@ -526,7 +907,7 @@ CRITICAL BILINGUAL FORMATTING RULES:
       "duration": "Time needed"
     }
   ]""",
-        'smallGroupInstruction': """
+    'smallGroupInstruction': """
   "smallGroupInstruction": {
     "groupingStrategy": "How to group students (by skill level, etc.)",
     "focusArea": "Specific skill or concept to target",
@@ -534,7 +915,7 @@ CRITICAL BILINGUAL FORMATTING RULES:
     "assessmentMethod": "How to monitor progress",
     "duration": "Recommended time per group"
   }""",
-        'tier2Intervention': """
+    'tier2Intervention': """
   "tier2Intervention": {
     "targetPopulation": "Which students need Tier 2 support",
     "interventionGoal": "Specific skill to address",
@@ -543,7 +924,7 @@ CRITICAL BILINGUAL FORMATTING RULES:
     "progressMonitoring": "How to track improvement",
     "resources": ["Materials and tools needed"]
   }""",
-        'tier3Intervention': """
+    'tier3Intervention': """
   "tier3Intervention": {
     "targetPopulation": "Students requiring intensive support",
     "interventionGoal": "Highly specific, measurable goal",
@@ -553,10 +934,208 @@ CRITICAL BILINGUAL FORMATTING RULES:
     "collaborationPlan": "Who to involve (specialists, parents, etc.)",
     "resources": ["Specialized materials and supports"]
   }"""
+})
+
+# mainLessonPlan pre-rendered for story requests and everything else
+MAIN_LESSON_PLAN_PROMPTS = MappingProxyType({
+    'story': MAIN_LESSON_PLAN_TEMPLATE.format(anticipatory_set_instruction=STORY_ANTICIPATORY_SET),
+    'default': MAIN_LESSON_PLAN_TEMPLATE.format(anticipatory_set_instruction=HOOK_ANTICIPATORY_SET)
+})
+
+
+# ==================== LESSON OUTPUT SCHEMAS ====================
+# JSON schemas matching the section skeletons above, for structured
+# outputs (strict mode: every property required, no extras)
+
+def _json_object(properties: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+_TEXT = {"type": "string"}
+_TEXT_LIST = {"type": "array", "items": _TEXT}
+
+SECTION_SCHEMAS = {
+    'mainLessonPlan': _json_object({
+        "objective": _TEXT,
+        "materials": _TEXT_LIST,
+        "anticipatorySet": _TEXT,
+        "directInstruction": _TEXT,
+        "modelingAndChecking": _TEXT,
+        "closure": _TEXT
+    }),
+    'guidedPractice': _json_object({
+        "description": _TEXT,
+        "activities": _TEXT_LIST,
+        "differentiationStrategies": _TEXT_LIST
+    }),
+    'independentPractice': _json_object({
+        "description": _TEXT,
+        "activities": _TEXT_LIST,
+        "assessmentCriteria": _TEXT_LIST
+    }),
+    'learningStations': {
+        "type": "array",
+        "items": _json_object({
+            "stationName": _TEXT,
+            "description": _TEXT,
+            "materials": _TEXT_LIST,
+            "instructions": _TEXT,
+            "duration": _TEXT
+        })
+    },
+    'smallGroupInstruction': _json_object({
+        "groupingStrategy": _TEXT,
+        "focusArea": _TEXT,
+        "activities": _TEXT_LIST,
+        "assessmentMethod": _TEXT,
+        "duration": _TEXT
+    }),
+    'tier2Intervention': _json_object({
+        "targetPopulation": _TEXT,
+        "interventionGoal": _TEXT,
+        "strategies": _TEXT_LIST,
+        "frequency": _TEXT,
+        "progressMonitoring": _TEXT,
+        "resources": _TEXT_LIST
+    }),
+    'tier3Intervention': _json_object({
+        "targetPopulation": _TEXT,
+        "interventionGoal": _TEXT,
+        "intensiveStrategies": _TEXT_LIST,
+        "frequency": _TEXT,
+        "dataCollection": _TEXT,
+        "collaborationPlan": _TEXT,
+        "resources": _TEXT_LIST
+    })
+}
+
+
+@lru_cache(maxsize=128)
+def lesson_response_format(sections: tuple) -> dict:
+    """
+    OpenAI response_format for a lesson with the given sections
+    
+    Args:
+        sections: Requested section names, in order (see requested_sections)
+    
+    Returns:
+        A strict json_schema format, or plain JSON mode when
+        LESSON_STRUCTURED_OUTPUTS is off
+    """
+    if not LESSON_STRUCTURED_OUTPUTS:
+        return {"type": "json_object"}
+    properties = {"lessonTitle": _TEXT}
+    for section in sections:
+        if section in SECTION_SCHEMAS:
+            properties[section] = SECTION_SCHEMAS[section]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "lesson_plan",
+            "strict": True,
+            "schema": _json_object(properties)
+        }
     }
+
+
+# ==================== LESSON GENERATION HELPERS ====================
+
+def validate_lesson_request(request: schemas.LessonPlanRequest) -> None:
+    """
+    Reject subject/grade combinations a subject isn't offered in
+    
+    Unsupported grades and subjects never get here: the GradeLevel and
+    Subject literals on LessonPlanRequest reject them with a 422.
+    """
+    if request.grade_level not in VALID_SUBJECTS[request.subject]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{request.subject} is only available for grades {', '.join(VALID_SUBJECTS[request.subject])}"
+        )
+
+
+async def reserve_lesson_quota(
+    db: AsyncSession, org: models.Organization, now: datetime, lessons: int = 1
+) -> Optional[bool]:
+    """
+    Count one lesson against the organization's monthly limit
+    
+    Args:
+        lessons: How many lessons the database fallback must leave room
+            for (it can't reserve, so a batch is checked in one go)
+    
+    Raises:
+        HTTPException 403 if the limit is reached
+    
+    Returns:
+        True if a Redis reservation was taken (release it if generation
+        fails), None if the limit was checked against the database
+    """
+    # Reserve one lesson of this month's quota; the Redis check-and-increment
+    # is atomic, so concurrent generates can't overshoot the limit
+    quota_reserved = await reserve_monthly_lesson(org.id, org.max_monthly_lessons, now)
+    if quota_reserved is None:
+        # Cold counter: seed it from the database and try again
+        monthly_usage = await count_monthly_lessons(db, org.id, now)
+        quota_reserved = await reserve_monthly_lesson(org.id, org.max_monthly_lessons, now)
+    
+    if quota_reserved is None:
+        # Redis unavailable: fall back to the database count
+        within_limit = monthly_usage + lessons <= org.max_monthly_lessons
+    else:
+        within_limit = quota_reserved
+    
+    if not within_limit:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Monthly limit of {org.max_monthly_lessons} lessons reached. Please upgrade your plan."
+        )
+    
+    return quota_reserved
+
+
+def requested_sections(request: schemas.LessonPlanRequest) -> tuple:
+    """Sections to generate, in order (the defaults if none were chosen)"""
+    return tuple(request.sections) if request.sections else DEFAULT_SECTIONS
+
+
+@lru_cache(maxsize=128)
+def section_prompts_block(sections: tuple, story: bool) -> str:
+    """
+    JSON structure part of the prompt for the given sections
+    
+    Only a few section combinations occur in practice, so after the first
+    request for one this is a lookup instead of a loop and join.
+    
+    Args:
+        sections: Requested section names, in order (see requested_sections)
+        story: Use the story variant of the main lesson plan
+    """
+    main_lesson_plan = MAIN_LESSON_PLAN_PROMPTS['story' if story else 'default']
+    section_prompts = []
+    for section in sections:
+        if section == 'mainLessonPlan':
+            section_prompts.append(main_lesson_plan)
+        elif section in SECTION_PROMPTS:
+            section_prompts.append(SECTION_PROMPTS[section])
+    return ',\n'.join(section_prompts)
+
+
+def build_lesson_prompt(request: schemas.LessonPlanRequest) -> str:
+    """Build the OpenAI user prompt for a lesson plan request"""
+    # Detect teacher request type
+    request_type = detect_teacher_request_type(request.teacher_notes or '', request.subject)
+    
+    # Generate the prompt
+    language_instruction = LANGUAGE_INSTRUCTIONS.get(request.language, LANGUAGE_INSTRUCTIONS["bilingual"])
     
     # Build JSON structure based on selected sections
-    selected_section_prompts = ',\n'.join([section_prompts[section] for section in sections if section in section_prompts])
+    selected_section_prompts = section_prompts_block(requested_sections(request), request_type == 'story')
     
     # Add teacher-specific instructions based on request type
     teacher_instructions = ""
@@ -570,59 +1149,41 @@ CRITICAL BILINGUAL FORMATTING RULES:
         else:
             teacher_instructions = f"\nTEACHER'S ADDITIONAL NOTES:\n{request.teacher_notes}\n"
     
-    prompt = f"""You are an expert K-8 educator specializing in Texas curriculum design with expertise in bilingual education. Generate a comprehensive, standards-aligned lesson plan.
-
-LANGUAGE REQUIREMENT: {language_instruction}
-
-REQUIREMENTS:
-- Grade Level: {request.grade_level}
-- Subject: {request.subject}
-- TEKS Standard: {request.teks_standard}
-- Learning Objective: {request.learning_objective}
-- Duration: {request.duration} minutes
-- Language Mode: {request.language}
-
-{teacher_instructions}
-
-Generate a lesson plan with ONLY the following sections in JSON format:
+    return LESSON_PROMPT_TEMPLATE.format(
+        language_instruction=language_instruction,
+        grade_level=request.grade_level,
+        subject=request.subject,
+        teks_standard=request.teks_standard,
+        learning_objective=request.learning_objective,
+        duration=request.duration,
+        language=request.language,
+        teacher_instructions=teacher_instructions,
+        selected_section_prompts=selected_section_prompts
+    )
 
-{{
-  "lessonTitle": "Engaging title for the lesson (bilingual if applicable)",
-{selected_section_prompts}
-}}
 
-Make the content practical, engaging, and directly applicable to {request.grade_level} grade {request.subject}.
+def parse_lesson_content(content: str) -> dict:
+    """Parse the model's JSON output (JSON mode, so no code fences to strip)"""
+    return orjson.loads(content)
 
-CRITICAL: If generating a story, write the complete 400-600 word narrative directly in the "anticipatorySet" field. Do not use placeholders."""
 
-    try:
-        # Call OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert K-12 educator and curriculum designer specializing in Texas TEKS standards. Generate comprehensive, practical lesson plans in valid JSON format only. When asked to write a story, write the complete narrative directly in the JSON - never use placeholders. Do not include any text before or after the JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=4000
-        )
-        
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
-        # Remove markdown code blocks if present
-        content = content.replace("```json\n", "").replace("```\n", "").replace("```", "").strip()
-        
-        # Parse JSON
-        lesson_content = json.loads(content)
-        
-        # Save to database
-        db_lesson = models.LessonPlan(
+async def save_lesson_plan(
+    db: AsyncSession,
+    request: schemas.LessonPlanRequest,
+    current_user: models.User,
+    org: models.Organization,
+    lesson_content: dict,
+    api_cost: float = LESSON_API_COST
+) -> models.LessonPlan:
+    """
+    Store a generated lesson plan and bump the organization's lesson total
+    
+    Both statements use RETURNING and commit together, so the saved row
+    comes back from the INSERT itself with no flush or refresh SELECT.
+    """
+    db_lesson = await db.scalar(
+        insert(models.LessonPlan)
+        .values(
             user_id=current_user.id,
             organization_id=current_user.organization_id,
             grade_level=request.grade_level,
@@ -632,73 +1193,895 @@ CRITICAL: If generating a story, write the complete 400-600 word narrative direc
             duration=request.duration,
             language=request.language,
             lesson_content=lesson_content,
-            api_cost=0.15  # GPT-4 Turbo cost
+            api_cost=api_cost
         )
-        db.add(db_lesson)
-        
-        # Update organization usage
-        org.total_lessons_generated += 1
-        
-        db.commit()
-        db.refresh(db_lesson)
+        .returning(models.LessonPlan)
+    )
+    
+    # Update organization usage
+    await increment_org_counters(db, org, total_lessons_generated=1)
+    
+    await db.commit()
+    
+    # Cached organization now has a stale lesson total, and the user's
+    # cached lesson list is missing the new lesson
+    await cache_delete(org_key(org.id), lesson_list_key(current_user.id))
+    
+    return db_lesson
+
+
+def lesson_cache_key(prompt: str, response_format: dict) -> str:
+    """
+    Redis key for content generated from this prompt
+    
+    Everything that shapes the completion (model, sampling settings,
+    system prompt, output schema) is part of the hash, so changing any
+    of them misses instead of serving content from the old settings.
+    The prompt is hashed with whitespace collapsed and case folded, so
+    requests differing only in the spacing or capitalization of the
+    teacher's text (objective, notes) share one entry.
+    """
+    raw = orjson.dumps([
+        OPENAI_MODEL, LESSON_TEMPERATURE, LESSON_MAX_TOKENS,
+        LESSON_SYSTEM_PROMPT, response_format, " ".join(prompt.split()).casefold()
+    ])
+    return lesson_content_key(hashlib.blake2b(raw, digest_size=16).hexdigest())
+
+
+# Completions in progress, by lesson_cache_key, so identical concurrent
+# requests in this process share one OpenAI call (single-flight)
+_INFLIGHT_LESSONS: dict = {}
+
+
+async def generate_lesson_content(prompt: str, response_format: dict, cache_key: str):
+    """
+    Get lesson content for a prompt, calling OpenAI at most once per prompt
+    
+    Checks the Redis lesson cache, then joins an identical generation
+    already running in this process, and only then calls OpenAI.
+    
+    Returns:
+        (lesson_content, reused): reused is True when no new OpenAI call
+        was made for this request
+    
+    Raises:
+        orjson.JSONDecodeError or the OpenAI error, also for requests
+        that joined a failed generation
+    """
+    lesson_content = await cache_get(cache_key)
+    if lesson_content is not None:
+        return lesson_content, True
+    
+    inflight = _INFLIGHT_LESSONS.get(cache_key)
+    if inflight is not None:
+        # shield: a cancelled follower mustn't cancel the shared call
+        return await asyncio.shield(inflight), True
+    
+    future = asyncio.get_running_loop().create_future()
+    _INFLIGHT_LESSONS[cache_key] = future
+    try:
+        response = await _call_llm(prompt, response_format)
+        lesson_content = parse_lesson_content(response.choices[0].message.content)
+    except asyncio.CancelledError:
+        future.set_exception(RuntimeError("Shared lesson generation was cancelled"))
+        future.exception()  # Retrieved here, so no warning when nobody joined
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    else:
+        future.set_result(lesson_content)
+    finally:
+        _INFLIGHT_LESSONS.pop(cache_key, None)
+    
+    await cache_set(cache_key, lesson_content, ttl=LESSON_CACHE_TTL_SECONDS)
+    return lesson_content, False
+
+
+def _lesson_call(request: schemas.LessonPlanRequest):
+    """One generate_lesson_content call covering all of the request's sections"""
+    prompt = build_lesson_prompt(request)
+    response_format = lesson_response_format(requested_sections(request))
+    return generate_lesson_content(prompt, response_format, lesson_cache_key(prompt, response_format))
+
+
+async def generate_lesson(request: schemas.LessonPlanRequest):
+    """
+    Get lesson content for a request (see generate_lesson_content)
+    
+    Requests with LESSON_PARALLEL_MIN_SECTIONS or more sections are split
+    into one call per section, run concurrently and merged in order.
+    
+    Returns:
+        (lesson_content, new_calls): new_calls is the number of OpenAI
+        calls made for this request (0 when everything was reused)
+    """
+    sections = [section for section in requested_sections(request) if section in SECTION_SCHEMAS]
+    if not LESSON_PARALLEL_MIN_SECTIONS or len(sections) < LESSON_PARALLEL_MIN_SECTIONS:
+        lesson_content, reused = await _lesson_call(request)
+        return lesson_content, 0 if reused else 1
+    
+    tasks = [
+        asyncio.create_task(_lesson_call(request.model_copy(update={"sections": [section]})))
+        for section in sections
+    ]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        # The lesson can't be completed without every part; stop the calls
+        # still running rather than pay for output nobody will use
+        for task in tasks:
+            task.cancel()
+        raise
+    # Every part has its own title; keep the first (the main lesson's, by default)
+    lesson_content = {"lessonTitle": parts[0][0].get("lessonTitle")}
+    for section, (part, _) in zip(sections, parts):
+        if section in part:
+            lesson_content[section] = part[section]
+    return lesson_content, sum(not reused for _, reused in parts)
+
+
+def _sse(event: str, data) -> bytes:
+    """Encode one server-sent event"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+# ==================== LESSON PLAN ENDPOINTS ====================
+
+@app.post("/api/lessons/generate", response_model=schemas.LessonPlan)
+async def generate_lesson_plan(
+    request: schemas.LessonPlanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Generate a new lesson plan using OpenAI"""
+    validate_lesson_request(request)
+    
+    if openai_client is None:
+        raise HTTPException(status_code=503, detail="OpenAI API key is not configured")
+    
+    # Check organization usage limits
+    org = await load_organization(db, current_user.organization_id)
+    now = datetime.utcnow()
+    quota_reserved = await reserve_lesson_quota(db, org, now)
+    # End the read transaction so the pooled connection isn't held for
+    # the 10-60s the model takes (expire_on_commit=False keeps org and
+    # current_user loaded); saving opens a fresh one
+    await db.commit()
+    
+    try:
+        # Identical requests (cached or in flight) reuse one OpenAI call
+        lesson_content, new_calls = await generate_lesson(request)
         
-        return db_lesson
+        # Save to database
+        return await save_lesson_plan(
+            db, request, current_user, org, lesson_content,
+            api_cost=LESSON_API_COST * new_calls
+        )
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
+        if quota_reserved:
+            await release_monthly_lesson(org.id, now)
         raise HTTPException(status_code=500, detail=f"Failed to parse OpenAI response: {str(e)}")
     except Exception as e:
+        if quota_reserved:
+            await release_monthly_lesson(org.id, now)
         raise HTTPException(status_code=500, detail=f"Failed to generate lesson plan: {str(e)}")
 
 
-@app.get("/api/lessons", response_model=List[schemas.LessonPlan])
+@app.post("/api/lessons/generate/stream")
+async def generate_lesson_plan_stream(
+    request: schemas.LessonPlanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Generate a new lesson plan, streaming OpenAI output as server-sent events
+    
+    Events:
+        delta: {"content": "..."} for each chunk of model output
+        complete: the saved lesson plan
+        error: {"detail": "..."} if generation or parsing fails
+    """
+    validate_lesson_request(request)
+    
+    if openai_client is None:
+        raise HTTPException(status_code=503, detail="OpenAI API key is not configured")
+    
+    # Check organization usage limits before opening the stream
+    org = await load_organization(db, current_user.organization_id)
+    now = datetime.utcnow()
+    quota_reserved = await reserve_lesson_quota(db, org, now)
+    # End the read transaction so the pooled connection isn't held for
+    # the 10-60s the model takes (expire_on_commit=False keeps org and
+    # current_user loaded); saving opens a fresh one
+    await db.commit()
+    
+    prompt = build_lesson_prompt(request)
+    response_format = lesson_response_format(requested_sections(request))
+    cache_key = lesson_cache_key(prompt, response_format)
+    
+    async def events():
+        chunks = []
+        saved = False
+        try:
+            # Identical requests replay earlier content as a single delta
+            lesson_content = await cache_get(cache_key)
+            if lesson_content is not None:
+                yield _sse("delta", {"content": orjson.dumps(lesson_content).decode()})
+                db_lesson = await save_lesson_plan(
+                    db, request, current_user, org, lesson_content, api_cost=0.0
+                )
+                saved = True
+            else:
+                async with LLM_SEM:
+                    stream = await _open_llm_stream(prompt, response_format)
+                    started = False
+                    try:
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            choice = chunk.choices[0]
+                            delta = choice.delta.content
+                            if delta:
+                                # Output that doesn't open a JSON object will
+                                # never parse; stop at the first real character
+                                if not started and delta.strip():
+                                    started = True
+                                    if not delta.lstrip().startswith("{"):
+                                        raise orjson.JSONDecodeError("Expected a JSON object", delta, 0)
+                                chunks.append(delta)
+                                yield _sse("delta", {"content": delta})
+                            if choice.finish_reason == "length":
+                                raise ValueError(f"Output was cut off at {LESSON_MAX_TOKENS} tokens")
+                    finally:
+                        # Dropping the connection also stops OpenAI generating
+                        # the rest when we bail out early or the client leaves
+                        await stream.response.aclose()
+                
+                lesson_content = parse_lesson_content("".join(chunks))
+                await cache_set(cache_key, lesson_content, ttl=LESSON_CACHE_TTL_SECONDS)
+                db_lesson = await save_lesson_plan(db, request, current_user, org, lesson_content)
+                saved = True
+        except orjson.JSONDecodeError as e:
+            yield _sse("error", {"detail": f"Failed to parse OpenAI response: {str(e)}"})
+            return
+        except Exception as e:
+            yield _sse("error", {"detail": f"Failed to generate lesson plan: {str(e)}"})
+            return
+        finally:
+            # Also runs when the client disconnects mid-stream (CancelledError
+            # or GeneratorExit at a yield), which the handlers above don't see
+            if quota_reserved and not saved:
+                await release_monthly_lesson(org.id, now)
+        
+        yield _sse("complete", schemas.LessonPlan.model_validate(db_lesson).model_dump(mode="json"))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Content-Encoding: identity keeps GZipMiddleware out, since it would
+        # hold events back in its compressor instead of sending each one
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"}
+    )
+
+
+# ==================== BACKGROUND GENERATION JOBS ====================
+# POST /api/lessons/jobs answers 202 right away and generates in a task on
+# this worker, so no request or DB connection is held for the 10-60s the
+# model takes. Job status lives in Redis, so any worker can answer polls.
+# Jobs running when a worker stops are lost (they stay "running" until
+# LESSON_JOB_TTL_SECONDS passes).
+
+# Strong references to running jobs; the event loop only keeps weak ones
+_LESSON_JOB_TASKS: set = set()
+
+
+async def set_lesson_job(job_id: str, user_id: int, status: str, **fields) -> None:
+    """Store a job's status (and its owner, checked when polling)"""
+    await cache_set(
+        lesson_job_key(job_id),
+        {"job_id": job_id, "user_id": user_id, "status": status, **fields},
+        ttl=LESSON_JOB_TTL_SECONDS
+    )
+
+
+async def run_lesson_job(
+    job_id: str,
+    request: schemas.LessonPlanRequest,
+    user_id: int,
+    org_id: int,
+    now: datetime,
+    quota_reserved: Optional[bool]
+) -> None:
+    """Generate and save a lesson plan for a queued job, recording the outcome"""
+    await set_lesson_job(job_id, user_id, "running")
+    
+    try:
+        lesson_content, new_calls = await generate_lesson(request)
+        
+        # The request's session is closed by now; save with a session of our own
+        async with SessionLocal() as db:
+            user = await db.get(models.User, user_id)
+            org = await load_organization(db, org_id)
+            db_lesson = await save_lesson_plan(
+                db, request, user, org, lesson_content,
+                api_cost=LESSON_API_COST * new_calls
+            )
+            lesson_plan = schemas.LessonPlan.model_validate(db_lesson).model_dump(mode="json")
+    except orjson.JSONDecodeError as e:
+        if quota_reserved:
+            await release_monthly_lesson(org_id, now)
+        await set_lesson_job(job_id, user_id, "failed", detail=f"Failed to parse OpenAI response: {str(e)}")
+    except Exception as e:
+        if quota_reserved:
+            await release_monthly_lesson(org_id, now)
+        await set_lesson_job(job_id, user_id, "failed", detail=f"Failed to generate lesson plan: {str(e)}")
+    else:
+        await set_lesson_job(job_id, user_id, "completed", lesson_plan=lesson_plan)
+
+
+@app.post("/api/lessons/jobs", response_model=schemas.LessonJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_lesson_job(
+    request: schemas.LessonPlanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Queue a lesson plan for background generation
+    
+    Poll GET /api/lessons/jobs/{job_id} for the result.
+    """
+    validate_lesson_request(request)
+    
+    if openai_client is None:
+        raise HTTPException(status_code=503, detail="OpenAI API key is not configured")
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Background generation requires Redis")
+    
+    # Limits are checked now, so a queued job never fails on quota
+    org = await load_organization(db, current_user.organization_id)
+    now = datetime.utcnow()
+    quota_reserved = await reserve_lesson_quota(db, org, now)
+    
+    job_id = uuid.uuid4().hex
+    await set_lesson_job(job_id, current_user.id, "queued")
+    
+    task = asyncio.create_task(run_lesson_job(
+        job_id, request, current_user.id, org.id, now, quota_reserved
+    ))
+    _LESSON_JOB_TASKS.add(task)
+    task.add_done_callback(_LESSON_JOB_TASKS.discard)
+    
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/api/lessons/jobs/{job_id}", response_model=schemas.LessonJob)
+async def get_lesson_job(
+    job_id: str,
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Get the status (and, once completed, the lesson plan) of a generation job"""
+    job = await cache_get(lesson_job_key(job_id))
+    if job is None or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+
+# ==================== BATCH GENERATION ====================
+# Bulk lesson creation through the OpenAI Batch API, at half the realtime
+# price in exchange for up to 24h turnaround. The pinned SDK predates
+# client.batches, so /batches is called through the client's generic
+# post/get. A poller on each worker saves lessons as batches finish.
+
+LESSON_BATCH_MAX_LESSONS = int(os.getenv("LESSON_BATCH_MAX_LESSONS", "100"))
+LESSON_BATCH_POLL_SECONDS = int(os.getenv("LESSON_BATCH_POLL_SECONDS", "300"))
+# Batch status requests in flight at once while polling
+LESSON_BATCH_POLL_CONCURRENCY = int(os.getenv("LESSON_BATCH_POLL_CONCURRENCY", "10"))
+# Batch API calls are billed at half the realtime rate
+LESSON_BATCH_API_COST = LESSON_API_COST / 2
+# Polls that may fail to download or save a finished batch's output before
+# it's marked failed and its quota given back
+LESSON_BATCH_MAX_SAVE_ATTEMPTS = int(os.getenv("LESSON_BATCH_MAX_SAVE_ATTEMPTS", "5"))
+# OpenAI batch statuses after which no output will arrive
+_BATCH_FAILED_STATUSES = frozenset({"failed", "expired", "cancelled"})
+
+
+def lesson_batch_data(batch: models.LessonBatch) -> dict:
+    """API form of a lesson batch"""
+    return {
+        "id": batch.id,
+        "status": batch.status,
+        "lesson_count": len(batch.requests),
+        "lessons_created": batch.lessons_created,
+        "created_at": batch.created_at,
+        "completed_at": batch.completed_at
+    }
+
+
+@app.post("/api/lessons/batch", response_model=schemas.LessonBatch, status_code=status.HTTP_202_ACCEPTED)
+async def create_lesson_batch(
+    batch: schemas.LessonBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Submit many lesson plans for generation through the OpenAI Batch API
+    
+    Poll GET /api/lessons/batch/{batch_id}; the lessons appear in
+    GET /api/lessons as the batch completes (within 24 hours).
+    """
+    if not 1 <= len(batch.lessons) <= LESSON_BATCH_MAX_LESSONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch must contain between 1 and {LESSON_BATCH_MAX_LESSONS} lessons"
+        )
+    for request in batch.lessons:
+        validate_lesson_request(request)
+    
+    if openai_client is None:
+        raise HTTPException(status_code=503, detail="OpenAI API key is not configured")
+    
+    # Every lesson in the batch counts against this month's limit up front
+    org = await load_organization(db, current_user.organization_id)
+    now = datetime.utcnow()
+    quota_reserved = None
+    reserved = 0
+    try:
+        for _ in batch.lessons:
+            quota_reserved = await reserve_lesson_quota(db, org, now, lessons=len(batch.lessons))
+            if quota_reserved is None:
+                # Redis unavailable: the database count doesn't move between
+                # iterations, so the whole batch was checked against it at once
+                break
+            reserved += 1
+    except HTTPException:
+        for _ in range(reserved):
+            await release_monthly_lesson(org.id, now)
+        raise
+    if quota_reserved is None:
+        # Counted against the database; return any reservations taken
+        # before Redis went away
+        for _ in range(reserved):
+            await release_monthly_lesson(org.id, now)
+    
+    # One JSONL line per lesson; custom_id is the lesson's index in the batch
+    lines = []
+    for index, request in enumerate(batch.lessons):
+        prompt = build_lesson_prompt(request)
+        response_format = lesson_response_format(requested_sections(request))
+        lines.append(orjson.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _lesson_completion_args(prompt, response_format)
+        }))
+    
+    try:
+        input_file = await openai_client.files.create(
+            file=("lessons.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        response = await openai_client.post(
+            "/batches",
+            body={
+                "input_file_id": input_file.id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            },
+            cast_to=httpx.Response
+        )
+        openai_batch_id = response.json()["id"]
+    except Exception as e:
+        if quota_reserved:
+            for _ in batch.lessons:
+                await release_monthly_lesson(org.id, now)
+        raise HTTPException(status_code=500, detail=f"Failed to submit lesson batch: {str(e)}")
+    
+    db_batch = models.LessonBatch(
+        user_id=current_user.id,
+        organization_id=org.id,
+        openai_batch_id=openai_batch_id,
+        status="submitted",
+        requests=[request.model_dump() for request in batch.lessons],
+        quota_reserved=bool(quota_reserved),
+        lessons_created=0
+    )
+    db.add(db_batch)
+    await db.commit()
+    
+    return lesson_batch_data(db_batch)
+
+
+@app.get("/api/lessons/batch/{batch_id}", response_model=schemas.LessonBatch)
+async def get_lesson_batch(
+    batch_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Get the status of a lesson batch"""
+    batch = await db.get(models.LessonBatch, batch_id)
+    if not batch or batch.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return lesson_batch_data(batch)
+
+
+async def save_batch_lessons(db: AsyncSession, batch: models.LessonBatch, output: str) -> int:
+    """
+    Add the lessons from a completed batch's output file to the session
+    
+    Lines that errored, don't parse or don't match one of the batch's
+    requests are skipped, so a bad line can't fail the whole batch. The
+    lessons go in one INSERT; the caller commits them together with the
+    batch's status.
+    
+    Returns:
+        Number of lessons saved
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            result = orjson.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            index = int(result["custom_id"])
+            if not 0 <= index < len(batch.requests):
+                continue
+            request = schemas.LessonPlanRequest(**batch.requests[index])
+            lesson_content = parse_lesson_content(response["body"]["choices"][0]["message"]["content"])
+        except (orjson.JSONDecodeError, ValidationError, ValueError, KeyError, IndexError, TypeError, AttributeError):
+            continue
+        rows.append({
+            "user_id": batch.user_id,
+            "organization_id": batch.organization_id,
+            "grade_level": request.grade_level,
+            "subject": request.subject,
+            "teks_standard": request.teks_standard,
+            "learning_objective": request.learning_objective,
+            "duration": request.duration,
+            "language": request.language,
+            "lesson_content": lesson_content,
+            "api_cost": LESSON_BATCH_API_COST
+        })
+    
+    if rows:
+        await db.execute(insert(models.LessonPlan), rows)
+        org = await load_organization(db, batch.organization_id)
+        await increment_org_counters(db, org, total_lessons_generated=len(rows))
+    return len(rows)
+
+
+@LLM_RETRY
+async def fetch_openai_batch(openai_batch_id: str, semaphore: asyncio.Semaphore) -> dict:
+    """Get a batch's current state from OpenAI, retrying with backoff on 429s"""
+    async with semaphore:
+        response = await openai_client.get(f"/batches/{openai_batch_id}", cast_to=httpx.Response)
+    return response.json()
+
+
+async def poll_lesson_batch(db: AsyncSession, batch: models.LessonBatch, openai_batch: dict) -> None:
+    """Save a submitted batch's lessons if OpenAI reports it has finished"""
+    if openai_batch["status"] != "completed" and openai_batch["status"] not in _BATCH_FAILED_STATUSES:
+        return
+    
+    # Claim the batch, so only one worker saves its lessons
+    claimed = await db.scalar(
+        update(models.LessonBatch)
+        .where(models.LessonBatch.id == batch.id, models.LessonBatch.status == "submitted")
+        .values(status="processing")
+        .returning(models.LessonBatch.id)
+    )
+    await db.commit()
+    if claimed is None:
+        return
+    
+    # Read before the try: a rollback expires the instance
+    batch_id = batch.id
+    user_id = batch.user_id
+    org_id = batch.organization_id
+    created_at = batch.created_at
+    lesson_count = len(batch.requests)
+    quota_reserved = batch.quota_reserved
+    try:
+        saved = 0
+        if openai_batch["status"] == "completed" and openai_batch.get("output_file_id"):
+            output = await openai_client.files.retrieve_content(openai_batch["output_file_id"])
+            saved = await save_batch_lessons(db, batch, output)
+        
+        # The lessons and the batch's final status commit together
+        await db.execute(
+            update(models.LessonBatch)
+            .where(models.LessonBatch.id == batch_id)
+            .values(
+                status="completed" if saved else "failed",
+                lessons_created=saved,
+                completed_at=func.now()
+            )
+        )
+        await db.commit()
+    except Exception as e:
+        # Nothing was saved. Bad output lines are skipped above, so this is
+        # a download or database error: hand the batch back to the next
+        # poll, until it has failed LESSON_BATCH_MAX_SAVE_ATTEMPTS times
+        await db.rollback()
+        attempts = await db.scalar(
+            update(models.LessonBatch)
+            .where(models.LessonBatch.id == batch_id)
+            .values(save_attempts=models.LessonBatch.save_attempts + 1)
+            .returning(models.LessonBatch.save_attempts)
+        )
+        if attempts < LESSON_BATCH_MAX_SAVE_ATTEMPTS:
+            await db.execute(
+                update(models.LessonBatch)
+                .where(models.LessonBatch.id == batch_id)
+                .values(status="submitted")
+            )
+            await db.commit()
+            logger.warning("Saving lesson batch %s failed, will retry: %s", batch_id, e)
+            return
+        
+        await db.execute(
+            update(models.LessonBatch)
+            .where(models.LessonBatch.id == batch_id)
+            .values(status="failed", completed_at=func.now())
+        )
+        await db.commit()
+        logger.error("Saving lesson batch %s failed %d times, giving up: %s", batch_id, attempts, e)
+        saved = 0
+    
+    # Quota reserved for lessons that weren't saved goes back
+    if quota_reserved:
+        for _ in range(lesson_count - saved):
+            await release_monthly_lesson(org_id, created_at)
+    if saved:
+        # Cached organization has a stale lesson total, and the user's
+        # cached lesson list is missing the new lessons
+        await cache_delete(org_key(org_id), lesson_list_key(user_id))
+
+
+async def _poll_lesson_batches() -> None:
+    """Check submitted batches every LESSON_BATCH_POLL_SECONDS"""
+    while True:
+        try:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    select(models.LessonBatch).where(models.LessonBatch.status == "submitted")
+                )
+                batches = result.scalars().all()
+                
+                # Statuses are fetched concurrently; finished batches are
+                # then saved one at a time on this session
+                semaphore = asyncio.Semaphore(LESSON_BATCH_POLL_CONCURRENCY)
+                openai_batches = await asyncio.gather(
+                    *(fetch_openai_batch(batch.openai_batch_id, semaphore) for batch in batches),
+                    return_exceptions=True
+                )
+                for batch, openai_batch in zip(batches, openai_batches):
+                    if isinstance(openai_batch, Exception):
+                        logger.warning("Lesson batch %s status check failed: %s", batch.id, openai_batch)
+                        continue
+                    await poll_lesson_batch(db, batch, openai_batch)
+        except Exception as e:
+            logger.warning("Lesson batch poll failed: %s", e)
+        await asyncio.sleep(LESSON_BATCH_POLL_SECONDS)
+
+
+_batch_poll_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_lesson_batch_polling():
+    """Start saving lessons from finished batches"""
+    global _batch_poll_task
+    if openai_client is not None:
+        _batch_poll_task = asyncio.create_task(_poll_lesson_batches())
+
+
+@app.on_event("shutdown")
+async def stop_lesson_batch_polling():
+    """Stop the batch poller"""
+    if _batch_poll_task is not None:
+        _batch_poll_task.cancel()
+
+
+# Columns for lesson lists; lesson_content is only served by
+# GET /api/lessons/{lesson_id}
+LESSON_SUMMARY_COLUMNS = (
+    models.LessonPlan.id,
+    models.LessonPlan.grade_level,
+    models.LessonPlan.subject,
+    models.LessonPlan.teks_standard,
+    models.LessonPlan.learning_objective,
+    models.LessonPlan.duration,
+    models.LessonPlan.language,
+    models.LessonPlan.created_at,
+)
+
+
+def encode_lesson_cursor(created_at: datetime, lesson_id: int) -> str:
+    """Opaque keyset cursor for the lesson list, pointing just past a lesson"""
+    raw = f"{created_at.isoformat()}|{lesson_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_lesson_cursor(cursor: str) -> tuple:
+    """
+    Read a cursor made by encode_lesson_cursor
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        created_at, lesson_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(lesson_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/lessons", response_model=List[schemas.LessonPlanSummary])
 async def get_lesson_plans(
-    skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """Get user's lesson plans"""
-    lessons = db.query(models.LessonPlan).filter(
-        models.LessonPlan.user_id == current_user.id
-    ).order_by(models.LessonPlan.created_at.desc()).offset(skip).limit(limit).all()
-    return lessons
+    """
+    Get user's lesson plans (summaries without the generated content)
+    
+    Newest first. Pass the X-Next-Cursor header of one page as `after`
+    to get the next; unlike `skip`, this costs the same at any depth.
+    The user's total number of lessons is sent in the X-Total-Count header.
+    """
+    list_key = lesson_list_key(current_user.id)
+    page = f"after:{after}:{limit}" if after else f"offset:{skip}:{limit}"
+    # Cached as {"items": [...], "total": ..., "next": cursor or None}
+    cached = await cache_hget(list_key, page)
+    if cached is None:
+        owned = models.LessonPlan.user_id == current_user.id
+        query = (
+            select(*LESSON_SUMMARY_COLUMNS)
+            .where(owned)
+            # id breaks ties between lessons saved in the same instant
+            .order_by(models.LessonPlan.created_at.desc(), models.LessonPlan.id.desc())
+            .limit(limit)
+        )
+        if after:
+            # Keyset: seek straight past the cursor's lesson on the
+            # (user_id, created_at) index; the total is a subquery because
+            # a window count would only see the rows after the cursor
+            query = query.add_columns(
+                select(func.count()).select_from(models.LessonPlan).where(owned)
+                .scalar_subquery().label("total")
+            ).where(tuple_(models.LessonPlan.created_at, models.LessonPlan.id) < decode_lesson_cursor(after))
+        else:
+            # count(*) OVER () puts the total on every row, so the page and
+            # the total come back from one query
+            query = query.add_columns(func.count().over().label("total")).offset(skip)
+        
+        result = await db.execute(query)
+        rows = result.mappings().all()
+        if rows:
+            total = rows[0]["total"]
+        elif skip or after:
+            # Past the last page: no row to read the total from
+            total = await db.scalar(select(func.count()).select_from(models.LessonPlan).where(owned))
+        else:
+            total = 0
+        cached = {
+            "items": [
+                schemas.LessonPlanSummary.model_validate(row).model_dump(mode="json")
+                for row in rows
+            ],
+            "total": total,
+            "next": (
+                encode_lesson_cursor(rows[-1]["created_at"], rows[-1]["id"])
+                if rows and len(rows) == limit else None
+            )
+        }
+        await cache_hset(list_key, page, cached, ttl=LESSON_LIST_CACHE_TTL_SECONDS)
+    
+    # The items were validated into LessonPlanSummary shape when the page
+    # was built, so they're sent as-is rather than re-validated against
+    # response_model (which stays for the OpenAPI docs)
+    headers = {"X-Total-Count": str(cached["total"])}
+    if cached["next"]:
+        headers["X-Next-Cursor"] = cached["next"]
+    return UTF8JSONResponse(cached["items"], headers=headers)
+
+
+# Roles that can read and delete any user's lessons
+ADMIN_ROLES = frozenset({"admin", "super_admin"})
+
+
+def check_lesson_access(lesson_user_id: int, current_user: models.User) -> None:
+    """
+    Allow a lesson's owner and admins through
+    
+    Raises:
+        HTTPException: 404 for anyone else, the same answer as for a
+        missing lesson, so other users' lesson ids can't be probed
+    """
+    if lesson_user_id != current_user.id and current_user.role not in ADMIN_ROLES:
+        raise HTTPException(status_code=404, detail="Lesson plan not found")
+
+
+async def get_owned_lesson(
+    lesson_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+) -> models.LessonPlan:
+    """
+    Dependency: the requested lesson, if the current user may access it
+    
+    Ownership is part of the WHERE clause, so other users' lessons are
+    never loaded.
+    
+    Raises:
+        HTTPException: 404 if it doesn't exist or isn't theirs
+    """
+    query = select(models.LessonPlan).where(models.LessonPlan.id == lesson_id)
+    if current_user.role not in ADMIN_ROLES:
+        query = query.where(models.LessonPlan.user_id == current_user.id)
+    lesson = await db.scalar(query)
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson plan not found")
+    return lesson
 
 
 @app.get("/api/lessons/{lesson_id}", response_model=schemas.LessonPlan)
 async def get_lesson_plan(
     lesson_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get a specific lesson plan"""
-    lesson = db.query(models.LessonPlan).filter(models.LessonPlan.id == lesson_id).first()
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lesson plan not found")
-    
-    # Check permissions
-    if lesson.user_id != current_user.id and current_user.role not in ["admin", "super_admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
+    # Cached as {"lesson": <LessonPlan JSON>, "etag": ...}
+    cached = await cache_get(lesson_plan_key(lesson_id))
+    if cached is None:
+        # Ownership is filtered in SQL, so only a lesson the user may read
+        # is ever loaded (and cached)
+        lesson = await get_owned_lesson(lesson_id, db, current_user)
+        cached = {
+            "lesson": schemas.LessonPlan.model_validate(lesson).model_dump(mode="json"),
+            "etag": make_etag(lesson.id, lesson.updated_at or lesson.created_at)
+        }
+        await cache_set(lesson_plan_key(lesson_id), cached)
+    else:
+        # A cached lesson may have been stored by its owner or an admin
+        check_lesson_access(cached["lesson"]["user_id"], current_user)
+    lesson_data = cached["lesson"]
     
-    return lesson
+    # The cached dict is already LessonPlan JSON; sending it directly skips
+    # re-validating it against response_model on every cache hit
+    return (
+        not_modified(request, response, cached["etag"], LESSON_CACHE_CONTROL)
+        or UTF8JSONResponse(lesson_data, headers=dict(response.headers))
+    )
 
 
 @app.delete("/api/lessons/{lesson_id}")
 async def delete_lesson_plan(
-    lesson_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    lesson: models.LessonPlan = Depends(get_owned_lesson),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a lesson plan"""
-    lesson = db.query(models.LessonPlan).filter(models.LessonPlan.id == lesson_id).first()
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lesson plan not found")
+    await db.delete(lesson)
+    await db.commit()
+    await cache_delete(lesson_plan_key(lesson.id), lesson_list_key(lesson.user_id))
     
-    # Check permissions
-    if lesson.user_id != current_user.id and current_user.role not in ["admin", "super_admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
+    # Keep the monthly usage counter in step with the lessons table
+    if lesson.created_at is not None:
+        await release_monthly_lesson(lesson.organization_id, lesson.created_at)
     
-    db.delete(lesson)
-    db.commit()
     return {"message": "Lesson plan deleted successfully"}
 
 
@@ -706,49 +2089,69 @@ async def delete_lesson_plan(
 
 @app.get("/api/admin/organizations", response_model=List[schemas.Organization])
 async def list_organizations(
-    db: Session = Depends(get_db),
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """List all organizations (admin only)"""
+    """
+    List organizations, oldest first (admin only)
+    
+    The total number of organizations is sent in the X-Total-Count header.
+    """
     if current_user.role != "super_admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    orgs = db.query(models.Organization).all()
-    return orgs
+    result = await db.execute(
+        select(models.Organization, func.count().over().label("total"))
+        .order_by(models.Organization.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    rows = result.all()
+    if rows:
+        total = rows[0].total
+    else:
+        total = await db.scalar(select(func.count()).select_from(models.Organization)) if skip else 0
+    
+    response.headers["X-Total-Count"] = str(total)
+    return [org for org, _ in rows]
 
 
 @app.get("/api/admin/stats", response_model=schemas.AdminStats)
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """Get platform-wide statistics (admin only)"""
+    """
+    Get platform-wide statistics (admin only)
+    
+    The figures aggregate every lesson, so they're computed at most once
+    per ADMIN_STATS_CACHE_TTL_SECONDS and may lag by that long.
+    """
     if current_user.role != "super_admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_orgs = db.query(models.Organization).count()
-    total_users = db.query(models.User).count()
-    total_lessons = db.query(models.LessonPlan).count()
+    cached = await cache_get(admin_stats_key())
+    if cached is not None:
+        return cached
     
-    # This month's lessons
-    now = datetime.utcnow()
-    first_day = datetime(now.year, now.month, 1)
-    monthly_lessons = db.query(models.LessonPlan).filter(
-        models.LessonPlan.created_at >= first_day
-    ).count()
-    
-    # Calculate total API cost
-    total_cost = db.query(models.LessonPlan).with_entities(
-        db.func.sum(models.LessonPlan.api_cost)
-    ).scalar() or 0
+    result = await db.execute(
+        ADMIN_STATS_QUERY,
+        {"first_day": _month_start(datetime.utcnow())}
+    )
+    stats = result.one()
     
-    return {
-        "total_organizations": total_orgs,
-        "total_users": total_users,
-        "total_lessons": total_lessons,
-        "monthly_lessons": monthly_lessons,
-        "total_api_cost": float(total_cost)
+    admin_stats = {
+        "total_organizations": stats.total_organizations,
+        "total_users": stats.total_users,
+        "total_lessons": stats.total_lessons,
+        "monthly_lessons": stats.monthly_lessons,
+        "total_api_cost": float(stats.total_api_cost)
     }
+    await cache_set(admin_stats_key(), admin_stats, ttl=ADMIN_STATS_CACHE_TTL_SECONDS)
+    return admin_stats
 
 
 # ==================== HEALTH CHECK ====================
@@ -769,7 +2172,7 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "openai": "configured" if openai.api_key else "not configured"
+        "openai": "configured" if openai_client is not None else "not configured"
     }
 
 
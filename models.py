@@ -3,8 +3,11 @@ Database Models
 SQLAlchemy models for the application
 """
 
-from sqlalchemy import Boolean, Column, Integer, String, Text, Float, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index, JSON
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from database import Base
 
@@ -13,66 +16,93 @@ class Organization(Base):
     """Charter School / Organization Model"""
     __tablename__ = "organizations"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False)
-    contact_email = Column(String(255), nullable=False)
-    contact_name = Column(String(255))
-    subscription_tier = Column(String(50), default="trial")  # trial, basic, pro, enterprise
-    max_monthly_lessons = Column(Integer, default=50)
-    is_active = Column(Boolean, default=True)
-    total_lessons_generated = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(255))
+    contact_email: Mapped[str] = mapped_column(String(255))
+    contact_name: Mapped[Optional[str]] = mapped_column(String(255))
+    subscription_tier: Mapped[Optional[str]] = mapped_column(String(50), default="trial")  # trial, basic, pro, enterprise
+    max_monthly_lessons: Mapped[Optional[int]] = mapped_column(default=50)
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)
+    total_lessons_generated: Mapped[Optional[int]] = mapped_column(default=0)
+    active_user_count: Mapped[Optional[int]] = mapped_column(default=0, server_default="0")
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    users = relationship("User", back_populates="organization")
-    lesson_plans = relationship("LessonPlan", back_populates="organization")
+    # lazy="raise" on every relationship: a lazy load would be a hidden
+    # round-trip (and fails under asyncio anyway), so any code that needs a
+    # related object must load it explicitly with selectinload()
+    users: Mapped[List["User"]] = relationship(back_populates="organization", lazy="raise")
+    lesson_plans: Mapped[List["LessonPlan"]] = relationship(back_populates="organization", lazy="raise")
 
 
 class User(Base):
     """Teacher / User Model"""
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(255), unique=True, index=True, nullable=False)
-    hashed_password = Column(String(255), nullable=False)
-    full_name = Column(String(255), nullable=False)
-    role = Column(String(50), default="teacher")  # teacher, admin, super_admin
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
-    is_active = Column(Boolean, default=True)
-    last_login = Column(DateTime(timezone=True))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    hashed_password: Mapped[str] = mapped_column(String(255))
+    full_name: Mapped[str] = mapped_column(String(255))
+    role: Mapped[Optional[str]] = mapped_column(String(50), default="teacher")  # teacher, admin, super_admin
+    organization_id: Mapped[int] = mapped_column(ForeignKey("organizations.id"))
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)
+    last_login: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    organization = relationship("Organization", back_populates="users")
-    lesson_plans = relationship("LessonPlan", back_populates="user")
+    organization: Mapped["Organization"] = relationship(back_populates="users", lazy="raise")
+    lesson_plans: Mapped[List["LessonPlan"]] = relationship(back_populates="user", lazy="raise")
 
 
 class LessonPlan(Base):
     """Generated Lesson Plan Model"""
     __tablename__ = "lesson_plans"
+    __table_args__ = (
+        # Monthly usage counts: WHERE organization_id = ? AND created_at >= ?
+        Index("ix_lessons_org_created", "organization_id", "created_at"),
+        # Lesson lists: WHERE user_id = ? ORDER BY created_at DESC
+        Index("ix_lessons_user_created", "user_id", "created_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    organization_id: Mapped[int] = mapped_column(ForeignKey("organizations.id"))
     
     # Lesson metadata
-    grade_level = Column(String(10), nullable=False)
-    subject = Column(String(100), nullable=False)
-    teks_standard = Column(String(100))
-    learning_objective = Column(Text, nullable=False)
-    duration = Column(Integer, default=45)  # in minutes
-    language = Column(String(20), default="bilingual")  # english, spanish, bilingual
+    grade_level: Mapped[str] = mapped_column(String(10))
+    subject: Mapped[str] = mapped_column(String(100))
+    teks_standard: Mapped[Optional[str]] = mapped_column(String(100))
+    learning_objective: Mapped[str] = mapped_column(Text)
+    duration: Mapped[Optional[int]] = mapped_column(default=45)  # in minutes
+    language: Mapped[Optional[str]] = mapped_column(String(20), default="bilingual")  # english, spanish, bilingual
     
     # Generated content (stored as JSON)
-    lesson_content = Column(JSON, nullable=False)
+    lesson_content: Mapped[Any] = mapped_column(JSON)
     
     # Tracking
-    api_cost = Column(Float, default=0.0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    api_cost: Mapped[Optional[float]] = mapped_column(default=0.0)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="lesson_plans")
-    organization = relationship("Organization", back_populates="lesson_plans")
+    user: Mapped["User"] = relationship(back_populates="lesson_plans", lazy="raise")
+    organization: Mapped["Organization"] = relationship(back_populates="lesson_plans", lazy="raise")
+
+
+class LessonBatch(Base):
+    """Bulk lesson generation submitted to the OpenAI Batch API"""
+    __tablename__ = "lesson_batches"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    organization_id: Mapped[int] = mapped_column(ForeignKey("organizations.id"))
+    openai_batch_id: Mapped[str] = mapped_column(String(255))
+    status: Mapped[str] = mapped_column(String(20), default="submitted", index=True)  # submitted, processing, completed, failed
+    requests: Mapped[Any] = mapped_column(JSON)  # LessonPlanRequest dicts; custom_id is the list index
+    quota_reserved: Mapped[bool] = mapped_column(default=False)  # Redis quota taken per lesson at submit
+    lessons_created: Mapped[int] = mapped_column(default=0)
+    save_attempts: Mapped[int] = mapped_column(default=0)  # Failed tries at saving the finished output
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -4,6 +4,6 @@ Provides API endpoints for querying Texas Essential Knowledge and Skills standar
 """
 
 from .router import router
-from .service import teks_service
+from .service import TEKSService, get_teks_service
 
-__all__ = ["router", "teks_service"]
+__all__ = ["router", "TEKSService", "get_teks_service"]
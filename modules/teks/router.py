@@ -3,9 +3,17 @@ TEKS Standards API Router
 Endpoints for querying Texas Essential Knowledge and Skills standards
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Dict
-from .service import teks_service
+from .service import TEKSService, get_teks_service
+
+# Same content type as the app's other JSON responses. Every endpoint
+# sends a body TEKSService serialized at load, so no request encodes JSON
+JSON_MEDIA_TYPE = "application/json; charset=utf-8"
+
+# The catalog only changes with a deployment; clients may reuse responses
+# for a day and then revalidate against the ETag
+TEKS_CACHE_CONTROL = "public, max-age=86400"
 
 # Create router
 router = APIRouter(
@@ -14,62 +22,45 @@ router = APIRouter(
 )
 
 
-@router.get("/grades")
-async def get_grades() -> Dict:
+def _json_response(request: Request, teks: TEKSService, body: bytes) -> Response:
     """
-    Get list of available grade levels
-    
-    Returns:
-        Dictionary with available grades
+    Send a pre-serialized body with the catalog's caching headers,
+    or a 304 with no body if the client's copy is current
     """
-    grades = teks_service.get_available_grades()
-    return {
-        "grades": grades,
-        "count": len(grades)
-    }
+    etag = teks.etag
+    if etag is None:
+        return Response(content=body, media_type=JSON_MEDIA_TYPE)
+    
+    headers = {"ETag": etag, "Cache-Control": TEKS_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    # Weak comparison: W/ prefixes are ignored (RFC 9110 13.1.2)
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
 
 
-@router.get("/{grade}/{subject}")
-async def get_standards(grade: str, subject: str) -> Dict:
+def _grade_not_found(teks: TEKSService, grade: str) -> HTTPException:
+    """404 for an unknown grade, listing the available ones"""
+    return HTTPException(
+        status_code=404,
+        detail=f"Grade '{grade}' not found. Available grades: {', '.join(teks.get_available_grades())}"
+    )
+
+
+@router.get("/grades")
+async def get_grades(request: Request, teks: TEKSService = Depends(get_teks_service)) -> Dict:
     """
-    Get TEKS standards for a specific grade and subject
-    
-    Args:
-        grade: Grade level (K, 1, 2, 3, 4, 5, 6, 7, 8)
-        subject: Subject name (Mathematics, English Language Arts, Science, Social Studies)
+    Get list of available grade levels
     
     Returns:
-        Dictionary with TEKS standards
+        Dictionary with available grades
     """
-    # Validate grade
-    available_grades = teks_service.get_available_grades()
-    if grade not in available_grades:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Grade '{grade}' not found. Available grades: {', '.join(available_grades)}"
-        )
-    
-    # Validate subject
-    available_subjects = teks_service.get_available_subjects(grade)
-    if subject not in available_subjects:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Subject '{subject}' not found for grade {grade}. Available subjects: {', '.join(available_subjects)}"
-        )
-    
-    # Get standards
-    standards = teks_service.get_standards(grade, subject)
-    
-    return {
-        "grade": grade,
-        "subject": subject,
-        "standards": standards,
-        "count": len(standards)
-    }
+    return _json_response(request, teks, teks.get_grades_json())
 
 
 @router.get("/{grade}/subjects")
-async def get_subjects(grade: str) -> Dict:
+async def get_subjects(request: Request, grade: str, teks: TEKSService = Depends(get_teks_service)) -> Dict:
     """
     Get available subjects for a specific grade
     
@@ -79,25 +70,16 @@ async def get_subjects(grade: str) -> Dict:
     Returns:
         Dictionary with available subjects
     """
-    # Validate grade
-    available_grades = teks_service.get_available_grades()
-    if grade not in available_grades:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Grade '{grade}' not found. Available grades: {', '.join(available_grades)}"
-        )
+    # A known grade is a hit in the response table (one dict lookup)
+    body = teks.get_subjects_json(grade)
+    if body is None:
+        raise _grade_not_found(teks, grade)
     
-    subjects = teks_service.get_available_subjects(grade)
-    
-    return {
-        "grade": grade,
-        "subjects": subjects,
-        "count": len(subjects)
-    }
+    return _json_response(request, teks, body)
 
 
 @router.get("/code/{teks_code}")
-async def get_standard_by_code(teks_code: str) -> Dict:
+async def get_standard_by_code(request: Request, teks_code: str, teks: TEKSService = Depends(get_teks_service)) -> Dict:
     """
     Get a specific TEKS standard by its code
     
@@ -107,26 +89,51 @@ async def get_standard_by_code(teks_code: str) -> Dict:
     Returns:
         TEKS standard details
     """
-    standard = teks_service.get_standard_by_code(teks_code)
+    body = teks.get_standard_json(teks_code)
     
-    if not standard:
+    if body is None:
         raise HTTPException(
             status_code=404,
             detail=f"TEKS standard '{teks_code}' not found"
         )
     
-    return {
-        "code": teks_code,
-        "standard": standard
-    }
+    return _json_response(request, teks, body)
 
 
 @router.get("/stats")
-async def get_statistics() -> Dict:
+async def get_statistics(request: Request, teks: TEKSService = Depends(get_teks_service)) -> Dict:
     """
     Get statistics about the TEKS database
     
     Returns:
         Dictionary with database statistics
     """
-    return teks_service.get_statistics()
+    return _json_response(request, teks, teks.get_statistics_json())
+
+
+# Registered last: "/{grade}/{subject}" would otherwise also match
+# "/code/{teks_code}" and "/{grade}/subjects"
+@router.get("/{grade}/{subject}")
+async def get_standards(request: Request, grade: str, subject: str, teks: TEKSService = Depends(get_teks_service)) -> Dict:
+    """
+    Get TEKS standards for a specific grade and subject
+    
+    Args:
+        grade: Grade level (K, 1, 2, 3, 4, 5, 6, 7, 8)
+        subject: Subject name (Mathematics, English Language Arts, Science, Social Studies)
+    
+    Returns:
+        Dictionary with TEKS standards
+    """
+    # A valid grade/subject pair is a hit in the response table (one dict
+    # lookup); which part was wrong is only worked out for the 404
+    body = teks.get_standards_json(grade, subject)
+    if body is None:
+        if teks.get_subjects_json(grade) is None:
+            raise _grade_not_found(teks, grade)
+        raise HTTPException(
+            status_code=404,
+            detail=f"Subject '{subject}' not found for grade {grade}. Available subjects: {', '.join(teks.get_available_subjects(grade))}"
+        )
+    
+    return _json_response(request, teks, body)
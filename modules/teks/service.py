@@ -3,9 +3,16 @@ TEKS Standards Service
 Handles loading and querying Texas Essential Knowledge and Skills standards
 """
 
-import json
-import os
-from typing import List, Dict, Optional
+from importlib.resources import files
+import asyncio
+import hashlib
+import logging
+import sys
+import threading
+import orjson
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 class TEKSService:
@@ -14,31 +21,102 @@ class TEKSService:
     def __init__(self):
         """Initialize the service and load TEKS data"""
         self.teks_data: Dict = {}
+        # Version of the loaded catalog for HTTP caching (None if it failed to load)
+        self.etag: Optional[str] = None
         self._load_teks_data()
+        self._build_indexes()
+        # The data is static, so its statistics (and their JSON) are too
+        self._stats = self._compute_statistics()
+        self._stats_json = orjson.dumps(self._stats)
+        self._build_responses()
     
     def _load_teks_data(self) -> None:
         """Load TEKS standards from JSON file"""
         try:
-            # Get the path to the TEKS JSON file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            json_path = os.path.join(current_dir, "teks_standards.json")
+            # Resolved through the package, so this also works when it's
+            # installed from a wheel or imported from a zip
+            json_path = files(__package__).joinpath("teks_standards.json")
             
-            with open(json_path, 'r', encoding='utf-8') as f:
-                self.teks_data = json.load(f)
+            # orjson parses the (UTF-8) bytes directly, much faster than json.load
+            raw = json_path.read_bytes()
+            self.teks_data = orjson.loads(raw)
+            # Weak: the gzip middleware may re-encode the bytes on the wire
+            self.etag = f'W/"{hashlib.sha256(raw).hexdigest()[:16]}"'
             
-            print(f"✅ TEKS data loaded successfully from {json_path}")
-            print(f"📊 Loaded data for grades: {list(self.teks_data.keys())}")
+            logger.debug("TEKS data loaded from %s: %d grades", json_path, len(self.teks_data))
             
         except FileNotFoundError:
-            print(f"❌ Error: TEKS standards file not found at {json_path}")
+            logger.error("TEKS standards file not found at %s", json_path)
             self.teks_data = {}
-        except json.JSONDecodeError as e:
-            print(f"❌ Error: Invalid JSON in TEKS file: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid JSON in TEKS file: %s", e)
             self.teks_data = {}
-        except Exception as e:
-            print(f"❌ Error loading TEKS data: {e}")
+        except Exception:
+            logger.exception("Error loading TEKS data")
             self.teks_data = {}
     
+    def _build_indexes(self) -> None:
+        """Build lookup tables over the loaded data (it never changes afterwards)"""
+        # TEKS code -> standard; a code listed under several subjects maps
+        # to its first occurrence, as the old linear search returned
+        self._code_index: Dict[str, Dict] = {}
+        for subjects in self.teks_data.values():
+            for standards in subjects.values():
+                for standard in standards:
+                    self._code_index.setdefault(standard.get("code"), standard)
+                    # A couple dozen strand names repeat across every standard;
+                    # keep one string per name instead of one per occurrence
+                    strand = standard.get("strand")
+                    if isinstance(strand, str):
+                        standard["strand"] = sys.intern(strand)
+        
+        self._grades_list: List[str] = list(self.teks_data.keys())
+        self._subjects_by_grade: Dict[str, List[str]] = {
+            grade: list(subjects.keys()) for grade, subjects in self.teks_data.items()
+        }
+    
+    def _build_responses(self) -> None:
+        """
+        Serialize the router's response bodies once; there are only a few
+        hundred distinct ones and none of them change after loading
+        """
+        grades = self._grades_list
+        self._grades_json = orjson.dumps({"grades": grades, "count": len(grades)})
+        self._subjects_json: Dict[str, bytes] = {
+            grade: orjson.dumps({"grade": grade, "subjects": subjects, "count": len(subjects)})
+            for grade, subjects in self._subjects_by_grade.items()
+        }
+        self._standards_json: Dict[Tuple[str, str], bytes] = {
+            (grade, subject): orjson.dumps({
+                "grade": grade,
+                "subject": subject,
+                "standards": standards,
+                "count": len(standards)
+            })
+            for grade, subjects in self.teks_data.items()
+            for subject, standards in subjects.items()
+        }
+        self._standard_json: Dict[str, bytes] = {
+            code: orjson.dumps({"code": code, "standard": standard})
+            for code, standard in self._code_index.items()
+        }
+    
+    def get_grades_json(self) -> bytes:
+        """GET /grades response body"""
+        return self._grades_json
+    
+    def get_subjects_json(self, grade: str) -> Optional[bytes]:
+        """GET /{grade}/subjects response body, or None for an unknown grade"""
+        return self._subjects_json.get(grade)
+    
+    def get_standards_json(self, grade: str, subject: str) -> Optional[bytes]:
+        """GET /{grade}/{subject} response body, or None if there's no such pair"""
+        return self._standards_json.get((grade, subject))
+    
+    def get_standard_json(self, teks_code: str) -> Optional[bytes]:
+        """GET /code/{teks_code} response body, or None for an unknown code"""
+        return self._standard_json.get(teks_code)
+    
     def get_standards(self, grade: str, subject: str) -> List[Dict]:
         """
         Get TEKS standards for a specific grade and subject
@@ -61,8 +139,8 @@ class TEKSService:
             # Return standards for subject (empty list if subject doesn't exist)
             return grade_data.get(subject, [])
             
-        except Exception as e:
-            print(f"❌ Error getting standards for {grade} {subject}: {e}")
+        except Exception:
+            logger.exception("Error getting standards for %s %s", grade, subject)
             return []
     
     def get_standard_by_code(self, teks_code: str) -> Optional[Dict]:
@@ -75,23 +153,11 @@ class TEKSService:
         Returns:
             TEKS standard dictionary or None if not found
         """
-        try:
-            # Search through all grades and subjects
-            for grade, subjects in self.teks_data.items():
-                for subject, standards in subjects.items():
-                    for standard in standards:
-                        if standard.get("code") == teks_code:
-                            return standard
-            
-            return None
-            
-        except Exception as e:
-            print(f"❌ Error searching for TEKS code {teks_code}: {e}")
-            return None
+        return self._code_index.get(teks_code)
     
     def get_available_grades(self) -> List[str]:
-        """Get list of available grade levels"""
-        return list(self.teks_data.keys())
+        """Get list of available grade levels (shared; don't modify)"""
+        return self._grades_list
     
     def get_available_subjects(self, grade: str) -> List[str]:
         """
@@ -101,19 +167,25 @@ class TEKSService:
             grade: Grade level
         
         Returns:
-            List of subject names
+            List of subject names (shared; don't modify)
         """
-        if grade in self.teks_data:
-            return list(self.teks_data[grade].keys())
-        return []
+        return self._subjects_by_grade.get(grade, [])
     
     def get_statistics(self) -> Dict:
         """
-        Get statistics about the TEKS database
+        Get statistics about the TEKS database (computed once at load)
         
         Returns:
-            Dictionary with statistics
+            Dictionary with statistics (shared; don't modify)
         """
+        return self._stats
+    
+    def get_statistics_json(self) -> bytes:
+        """get_statistics() already serialized as JSON"""
+        return self._stats_json
+    
+    def _compute_statistics(self) -> Dict:
+        """Walk the loaded data and count grades, subjects and standards"""
         stats = {
             "total_grades": len(self.teks_data),
             "grades": list(self.teks_data.keys()),
@@ -135,5 +207,27 @@ class TEKSService:
         return stats
 
 
-# Create singleton instance
-teks_service = TEKSService()
+_teks_service: Optional[TEKSService] = None
+_teks_service_lock = threading.Lock()
+
+
+def _load_teks_service() -> TEKSService:
+    """Build the shared TEKSService once, however many threads ask for it"""
+    global _teks_service
+    with _teks_service_lock:
+        if _teks_service is None:
+            _teks_service = TEKSService()
+    return _teks_service
+
+
+async def get_teks_service() -> TEKSService:
+    """
+    FastAPI dependency for the shared TEKSService
+    
+    The catalog is loaded by the first request that needs it rather than
+    at import, in a worker thread so reading and indexing it doesn't
+    stall the event loop. Afterwards this returns without leaving it.
+    """
+    if _teks_service is not None:
+        return _teks_service
+    return await asyncio.to_thread(_load_teks_service)
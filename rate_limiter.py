@@ -0,0 +1,80 @@
+"""
+Rate Limiter
+Proactive request/token budget for OpenAI calls (per process)
+"""
+
+from typing import Optional
+import asyncio
+import time
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English/Spanish text (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    """
+    Rolling requests-per-minute and tokens-per-minute budget
+
+    Capacity refills continuously at rpm/60 and tpm/60 per second, up to
+    one minute's worth. acquire() waits until both budgets cover the call,
+    so requests are delayed before they're sent instead of being retried
+    after a 429.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.max_requests = float(requests_per_minute)
+        self.max_tokens = float(tokens_per_minute)
+        self.available_request_capacity = self.max_requests
+        self.available_token_capacity = self.max_tokens
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        self.available_request_capacity = min(
+            self.max_requests,
+            self.available_request_capacity + elapsed * self.max_requests / 60
+        )
+        self.available_token_capacity = min(
+            self.max_tokens,
+            self.available_token_capacity + elapsed * self.max_tokens / 60
+        )
+
+    async def acquire(self, tokens: int) -> int:
+        """
+        Wait until one request and `tokens` tokens are available, then take them
+
+        Args:
+            tokens: Estimated tokens for the call (prompt + completion cap)
+
+        Returns:
+            Tokens actually reserved (capped at one minute's budget), to
+            pass to reconcile() once the real usage is known
+        """
+        tokens = min(tokens, int(self.max_tokens))
+        while True:
+            async with self._lock:
+                self._refill()
+                if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return tokens
+                # Time until both budgets have refilled enough
+                wait = max(
+                    (1 - self.available_request_capacity) * 60 / self.max_requests,
+                    (tokens - self.available_token_capacity) * 60 / self.max_tokens,
+                )
+            await asyncio.sleep(wait)
+
+    def reconcile(self, reserved: int, actual: Optional[int]) -> None:
+        """Return the unused part of a token reservation once usage is known"""
+        if actual is None:
+            return
+        self.available_token_capacity = min(
+            self.max_tokens,
+            self.available_token_capacity + reserved - actual
+        )
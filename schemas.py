@@ -4,7 +4,7 @@ Request and response models for API validation
 """
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 
@@ -80,9 +80,22 @@ class OrganizationUsage(BaseModel):
 
 # ==================== LESSON PLAN SCHEMAS ====================
 
+# Supported grades (K-8) and subjects, checked by pydantic before the
+# handler runs; which grades each subject covers is checked in main.py
+GradeLevel = Literal['K', '1', '2', '3', '4', '5', '6', '7', '8']
+Subject = Literal[
+    'Mathematics',
+    'Advanced Mathematics',
+    'English Language Arts',
+    'Spanish Language Arts',
+    'Science',
+    'Social Studies'
+]
+
+
 class LessonPlanRequest(BaseModel):
-    grade_level: str
-    subject: str
+    grade_level: GradeLevel
+    subject: Subject
     teks_standard: Optional[str] = None
     learning_objective: str
     duration: int = 45
@@ -100,6 +113,15 @@ class LessonPlanBase(BaseModel):
     language: str = "bilingual"
 
 
+class LessonPlanSummary(LessonPlanBase):
+    """List view of a lesson plan (no generated content)"""
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class LessonPlan(LessonPlanBase):
     id: int
     user_id: int
@@ -112,6 +134,28 @@ class LessonPlan(LessonPlanBase):
         from_attributes = True
 
 
+class LessonJob(BaseModel):
+    """Status of a background lesson generation job"""
+    job_id: str
+    status: str  # queued, running, completed, failed
+    lesson_plan: Optional[LessonPlan] = None  # Set once completed
+    detail: Optional[str] = None  # Error message if failed
+
+
+class LessonBatchCreate(BaseModel):
+    lessons: List[LessonPlanRequest]
+
+
+class LessonBatch(BaseModel):
+    """Status of a bulk generation submitted to the OpenAI Batch API"""
+    id: int
+    status: str  # submitted, processing, completed, failed
+    lesson_count: int
+    lessons_created: int
+    created_at: Optional[datetime]
+    completed_at: Optional[datetime]
+
+
 # ==================== ADMIN SCHEMAS ====================
 
 class AdminStats(BaseModel):